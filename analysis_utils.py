@@ -1,6 +1,42 @@
 import datetime
 from interpretation_data import PLANET_IN_HOUSE, PLANET_IN_SIGN
 from karmic_data import RAHU_HOUSE_PURPOSE, KETU_HOUSE_KARMA, RAHU_NAKSHATRA_PURPOSE, KETU_NAKSHATRA_KARMA
+from astrology_utils import NAKSHATRAS
+
+# --- RELATIONAL TABLES (built once at import) ---
+# Signs are 0 (Aries) .. 11 (Pisces); houses are 1 .. 12.
+
+SIGNS = ['Aries', 'Taurus', 'Gemini', 'Cancer', 'Leo', 'Virgo', 
+         'Libra', 'Scorpio', 'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces']
+
+# Sign -> Lord
+SIGN_LORDS = ['Mars', 'Venus', 'Mercury', 'Moon', 'Sun', 'Mercury',
+              'Venus', 'Mars', 'Jupiter', 'Saturn', 'Saturn', 'Jupiter']
+
+# HOUSE_SIGNS[lagna][house] / HOUSE_LORDS[lagna][house] for each of the
+# 12 lagnas (index 0 of the inner lists is unused)
+HOUSE_SIGNS = [[None] + [(lagna + h - 1) % 12 for h in range(1, 13)] for lagna in range(12)]
+HOUSE_LORDS = [[None] + [SIGN_LORDS[s] for s in signs[1:]] for signs in HOUSE_SIGNS]
+
+KENDRA_HOUSES = frozenset([1, 4, 7, 10])
+DUSTHANA_HOUSES = frozenset([6, 8, 12])
+# Zero-based distances that count as 1st, 4th, 7th, 10th from a planet
+KENDRA_DISTANCES = frozenset([0, 3, 6, 9])
+MANGLIK_HOUSES = frozenset([1, 4, 7, 8, 12])
+
+# Pancha Mahapurusha: planet in own/exalted sign AND in Kendra from Lagna
+MAHAPURUSHA_YOGAS = [
+    ('Mars', frozenset([0, 7, 9]), "Ruchaka Yoga",
+     "Strong Mars in Kendra. Indicates courage, leadership, and physical strength."),
+    ('Mercury', frozenset([2, 5]), "Bhadra Yoga",
+     "Strong Mercury in Kendra. Outstanding intellect, speech, and analysis."),
+    ('Jupiter', frozenset([8, 11, 3]), "Hamsa Yoga",
+     "Strong Jupiter in Kendra. Bringing wisdom, purity, and spiritual inclination."),
+    ('Venus', frozenset([1, 6, 11]), "Malavya Yoga",
+     "Strong Venus in Kendra. Granting luxury, beauty, and artistic talent."),
+    ('Saturn', frozenset([9, 10, 6]), "Shasha Yoga",
+     "Strong Saturn in Kendra. Authority, discipline, and longevity."),
+]
 
 def get_yogas(chart_data):
     """
@@ -8,46 +44,13 @@ def get_yogas(chart_data):
     """
     yogas = []
     
-    # Extract data for easier access
-    # d1 is House -> [Planets]
-    d1 = chart_data.get('d1', {})
-    # details has Ascendant Sign
-    asc_sign = chart_data['details']['Ascendant']
-    
-    # Planetary Details List for Sign/Degree info
-    p_details = {p['Planet']: p for p in chart_data['planetary_details']}
-    
-    # Helper: Get House of a Planet
-    def get_house(planet_name):
-        for h, planets in d1.items():
-            if planet_name in planets:
-                return int(h)
-        return None
-        
-    # Helper: Get Sign of a Planet
-    def get_sign(planet_name):
-        if planet_name in p_details:
-            return p_details[planet_name]['Sign']
-        return None
-
-    # Helper: Get Lord of a House
-    signs_order = ['Aries', 'Taurus', 'Gemini', 'Cancer', 'Leo', 'Virgo', 
-                   'Libra', 'Scorpio', 'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces']
-    
-    sign_lords = {
-        'Aries': 'Mars', 'Taurus': 'Venus', 'Gemini': 'Mercury', 'Cancer': 'Moon',
-        'Leo': 'Sun', 'Virgo': 'Mercury', 'Libra': 'Venus', 'Scorpio': 'Mars',
-        'Sagittarius': 'Jupiter', 'Capricorn': 'Saturn', 'Aquarius': 'Saturn', 'Pisces': 'Jupiter'
-    }
-    
-    asc_idx = signs_order.index(asc_sign)
+    # Houses and signs are read straight off the Chart arrays
+    get_house = chart_data.house_of
+    get_sign = chart_data.sign_of
+    house_planets = chart_data.house_planets()
     
-    def get_lord_of_house_num(house_num):
-        # House 1 is asc_sign. House 2 is next sign...
-        # sign_idx = (asc_idx + (house_num - 1)) % 12
-        sign_idx = (asc_idx + (house_num - 1)) % 12
-        sign = signs_order[sign_idx]
-        return sign_lords[sign]
+    # Lord of each house for this Lagna
+    house_lords = HOUSE_LORDS[chart_data.asc_sign]
 
     # --- YOGA CHECKS ---
 
@@ -56,12 +59,8 @@ def get_yogas(chart_data):
     jupiter_house = get_house('Jupiter')
     
     if moon_house and jupiter_house:
-        # Distance from Moon to Jupiter
-        dist = (jupiter_house - moon_house) % 12
-        if dist < 0: dist += 12
-        # Counting inclusive: 0 (same), 3 (4th), 6 (7th), 9 (10th)
-        # indices diff is 0, 3, 6, 9 corresponds to 1st, 4th, 7th, 10th positions
-        if dist in [0, 3, 6, 9]:
+        # Distance from Moon to Jupiter; 0, 3, 6, 9 are the 1st, 4th, 7th, 10th
+        if (jupiter_house - moon_house) % 12 in KENDRA_DISTANCES:
             yogas.append({
                 "name": "Gajakesari Yoga",
                 "desc": "Jupiter in Kendra from Moon. Brings wisdom, wealth, and respect."
@@ -76,64 +75,16 @@ def get_yogas(chart_data):
             "desc": "Sun and Mercury combined. Excellent for intellect, communication, and business."
         })
         
-    # 3. Ruchaka Yoga (Pancha Mahapurusha): Mars in Own/Exalted sign AND in Kendra (1,4,7,10 from Lagna)
-    mars_sign = get_sign('Mars')
-    mars_house = get_house('Mars')
-    if mars_house in [1, 4, 7, 10]:
-        if mars_sign in ['Aries', 'Scorpio', 'Capricorn']: # Own or Exalted
-            yogas.append({
-                "name": "Ruchaka Yoga",
-                "desc": "Strong Mars in Kendra. Indicates courage, leadership, and physical strength."
-            })
-            
-    # 4. Bhadra Yoga: Mercury in Own/Exalted AND in Kendra
-    merc_sign = get_sign('Mercury')
-    merc_house = get_house('Mercury')
-    if merc_house in [1, 4, 7, 10]:
-        if merc_sign in ['Gemini', 'Virgo']:
-            yogas.append({
-                "name": "Bhadra Yoga",
-                "desc": "Strong Mercury in Kendra. Outstanding intellect, speech, and analysis."
-            })
-
-    # 5. Hamsa Yoga: Jupiter in Own/Exalted AND in Kendra
-    jup_sign = get_sign('Jupiter')
-    jup_house = get_house('Jupiter')
-    if jup_house in [1, 4, 7, 10]:
-        if jup_sign in ['Sagittarius', 'Pisces', 'Cancer']:
-            yogas.append({
-                "name": "Hamsa Yoga",
-                "desc": "Strong Jupiter in Kendra. Bringing wisdom, purity, and spiritual inclination."
-            })
-            
-    # 6. Malavya Yoga: Venus in Own/Exalted AND in Kendra
-    ven_sign = get_sign('Venus')
-    ven_house = get_house('Venus')
-    if ven_house in [1, 4, 7, 10]:
-        if ven_sign in ['Taurus', 'Libra', 'Pisces']:
-            yogas.append({
-                "name": "Malavya Yoga",
-                "desc": "Strong Venus in Kendra. Granting luxury, beauty, and artistic talent."
-            })
-
-    # 7. Shasha Yoga: Saturn in Own/Exalted AND in Kendra
-    sat_sign = get_sign('Saturn')
-    sat_house = get_house('Saturn')
-    if sat_house in [1, 4, 7, 10]:
-        if sat_sign in ['Capricorn', 'Aquarius', 'Libra']:
-            yogas.append({
-                "name": "Shasha Yoga",
-                "desc": "Strong Saturn in Kendra. Authority, discipline, and longevity."
-            })
+    # 3-7. Ruchaka, Bhadra, Hamsa, Malavya, Shasha (Pancha Mahapurusha)
+    for planet, strong_signs, y_name, y_desc in MAHAPURUSHA_YOGAS:
+        if get_house(planet) in KENDRA_HOUSES and get_sign(planet) in strong_signs:
+            yogas.append({"name": y_name, "desc": y_desc})
             
     # 8. Lakshmi Yoga: 9th Lord in Kendra/Trikona (1,4,7,10, 5,9) & Exalted/Own sign OR with Ascendant Lord
-    # Simplified: 9th Lord in Own/Exal sign.
-    lord_9 = get_lord_of_house_num(9)
-    # Finding where Lord 9 is
-    # This requires more mapping (which planet corresponds to string 'Mars')
-    # Let's skip complex lordship logic implementation for MVP and stick to planet positions.
+    # Skipped for MVP: needs a fuller lordship model than planet positions.
     
     # 9. Chandra Mangal Yoga: Moon and Mars conjunction
+    mars_house = get_house('Mars')
     if moon_house and mars_house and moon_house == mars_house:
          yogas.append({
             "name": "Chandra Mangal Yoga",
@@ -142,29 +93,25 @@ def get_yogas(chart_data):
         
     # 10. Vipreet Raja Yoga (Harsha, Sarala, Vimala)
     # Lords of 6, 8, 12 in 6, 8, 12
-    lord_6 = get_lord_of_house_num(6)
-    lord_8 = get_lord_of_house_num(8)
-    lord_12 = get_lord_of_house_num(12)
+    lord_6 = house_lords[6]
+    lord_8 = house_lords[8]
+    lord_12 = house_lords[12]
     
-    # Mapping planet names to houses
-    # Need to find house of lord_6
     house_of_lord_6 = get_house(lord_6)
     house_of_lord_8 = get_house(lord_8)
     house_of_lord_12 = get_house(lord_12)
     
-    dusthana = [6, 8, 12]
-    
-    if house_of_lord_6 in dusthana:
+    if house_of_lord_6 in DUSTHANA_HOUSES:
         yogas.append({
             "name": "Harsha Vipreet Raja Yoga",
             "desc": f"Lord of 6th ({lord_6}) is in House {house_of_lord_6}. Health, wealth, and victory over enemies."
         })
-    if house_of_lord_8 in dusthana:
+    if house_of_lord_8 in DUSTHANA_HOUSES:
         yogas.append({
             "name": "Sarala Vipreet Raja Yoga",
             "desc": f"Lord of 8th ({lord_8}) is in House {house_of_lord_8}. Longevity, fearlessness, and prosperity."
         })
-    if house_of_lord_12 in dusthana:
+    if house_of_lord_12 in DUSTHANA_HOUSES:
         yogas.append({
             "name": "Vimala Vipreet Raja Yoga",
             "desc": f"Lord of 12th ({lord_12}) is in House {house_of_lord_12}. Independence, happiness, and just conduct."
@@ -172,22 +119,12 @@ def get_yogas(chart_data):
 
     # 11. Kemadruma Yoga (Negative but important)
     # No planet in 2nd or 12th from Moon (excluding Sun/Rahu/Ketu)
-    # This checks neighbors of Moon House
     if moon_house:
         prev_h = (moon_house - 2) % 12 + 1 # 12th from Moon
         next_h = moon_house % 12 + 1 # 2nd from Moon
         
-        has_planet_prev = False
-        has_planet_next = False
-        
-        # Check all houses for planets
-        for h, planets in d1.items():
-            if h == prev_h:
-               valid_ps = [p for p in planets if p not in ['Sun', 'Rahu', 'Ketu']]
-               if valid_ps: has_planet_prev = True
-            if h == next_h:
-               valid_ps = [p for p in planets if p not in ['Sun', 'Rahu', 'Ketu']]
-               if valid_ps: has_planet_next = True
+        has_planet_prev = any(p not in ('Sun', 'Rahu', 'Ketu') for p in house_planets[prev_h])
+        has_planet_next = any(p not in ('Sun', 'Rahu', 'Ketu') for p in house_planets[next_h])
                
         if not has_planet_prev and not has_planet_next:
             # Check Kendra from Lagna/Moon can cancel it, but let's just flag it for detailed analysis
@@ -198,223 +135,17 @@ def get_yogas(chart_data):
             
     return yogas
 
-    # 12. Parasara Raja Yoga (Kendra-Trikona Relationships)
-    # Lords of Kendra (1, 4, 7, 10) and Trikona (1, 5, 9) in conjunction or mutual aspect (we check conjunction here for MVP)
-    # Most powerful: 9th and 10th Lords. 
-    # Also 4th+5th, 1st+5th, 1st+9th etc.
-    
-    kendra_houses = [1, 4, 7, 10]
-    trikona_houses = [1, 5, 9]
-    
-    # Check all Kendra + Trikona combinations
-    # Simplified: Check Conjunctions
-    
-    for k in kendra_houses:
-        for t in trikona_houses:
-            k_lord = get_lord_of_house_num(k)
-            t_lord = get_lord_of_house_num(t)
-            
-            # Avoid self-conjunction (1st lord with 1st lord)
-            if k_lord == t_lord:
-                continue
-                
-            k_house = get_house(k_lord)
-            t_house = get_house(t_lord)
-            
-            if k_house and t_house and k_house == t_house:
-                # Special Name for 9th+10th
-                y_name = f"Dharma-Karma Adhipati Yoga (Lords of {k} and {t})" if {k,t} == {9,10} else f"Raja Yoga (Lords of {k} and {t})"
-                
-                # Check duplication?
-                exists = any(y['name'] == y_name for y in yogas)
-                if not exists:
-                     yogas.append({
-                        "name": y_name,
-                        "desc": f"Conjunction of Kendra ({k}) and Trikona ({t}) lords. Brings power, success, and luck."
-                    })
-
-    # 13. Parivartana Yoga (Exchange of Signs)
-    # Check if Planet A is in B's sign AND Planet B is in A's sign
-    # We essentially check houses. 
-    # Lord of House X in House Y AND Lord of House Y in House X.
-    
-    # Iterate all unique pairs of houses (1-12)
-    checked_pairs = set()
-    for h1 in range(1, 13):
-        for h2 in range(h1 + 1, 13):
-            l1 = get_lord_of_house_num(h1)
-            l2 = get_lord_of_house_num(h2)
-            
-            # Where are they placed?
-            p1_house = get_house(l1)
-            p2_house = get_house(l2)
-            
-            if p1_house == h2 and p2_house == h1:
-                # Exchange Detected
-                # Categorize: 
-                # Maha Parivartana: Kendra/Trikona or 2, 11 involvement (Good)
-                # Dainya: 6, 8, 12 involved (Bad)
-                # Khala: 3rd involved (Mixed)
-                
-                is_dusthana = any(h in [6, 8, 12] for h in [h1, h2])
-                
-                if is_dusthana:
-                     # Skip Dainya for "Raja Yoga" request, or label appropriately? 
-                     # User asked for "All other Raja Yogas", usually implies Good ones.
-                     # But Parivartana is powerful. Let's list Maha only if we want to be strict, or list all.
-                     # Let's list Dainya as "Dainya Yoga" (not Raja).
-                     pass 
-                else:
-                    yogas.append({
-                        "name": "Maha Parivartana Yoga",
-                        "desc": f"Exchange of signs between Lords of {h1} and {h2}. Mutual strengthening of houses."
-                    })
-                    
-    # 14. Neech Bhanga Raja Yoga (Cancellation of Debilitation)
-    # Logic: If a planet is debilitated, check conditions to cancel it.
-    # 1. Lord of the sign where it is debilitated is in Kendra from Lagna or Moon.
-    # 2. Planet that would be exalted in that sign is in Kendra from Lagna or Moon.
-    
-    debilitation_map = {
-        'Sun': 'Libra', 'Moon': 'Scorpio', 'Mars': 'Cancer', 'Mercury': 'Pisces',
-        'Jupiter': 'Capricorn', 'Venus': 'Virgo', 'Saturn': 'Aries'
-    }
-    
-    exaltation_map = {v: k for k, v in debilitation_map.items()} # Inverted? No.
-    # Exaltation signs: Sun->Aries, Moon->Taurus, Mars->Cap, Merc->Virgo, Jup->Cancer, Ven->Pisces, Sat->Libra.
-    # The map above checks Debilitation.
-    # E.g. If Sun is in Libra. Lord of Libra is Venus. Is Venus in Kendra?
-    # Or, Planet Exalted in Libra is Saturn. Is Saturn in Kendra?
-    
-    planet_exalted_in_sign = {
-        'Aries': 'Sun', 'Taurus': 'Moon', 'Capricorn': 'Mars', 'Virgo': 'Mercury',
-        'Cancer': 'Jupiter', 'Pisces': 'Venus', 'Libra': 'Saturn'
-    }
-    
-    for planet, deb_sign in debilitation_map.items():
-        p_sign = get_sign(planet)
-        if p_sign == deb_sign:
-            # Planet is Debilitated
-            is_cancelled = False
-            reason = ""
-            
-            # Condition 1: Lord of Debilitation Sign
-            lord_of_deb = sign_lords[deb_sign]
-            lord_house_lagna = get_house(lord_of_deb)
-            
-            # Kendra from Lagna
-            if lord_house_lagna in [1, 4, 7, 10]:
-                is_cancelled = True
-                reason = f"Lord of debilitation sign ({lord_of_deb}) is in Kendra."
-                
-            # Kendra from Moon
-            # Need relative house
-            if not is_cancelled and moon_house and lord_house_lagna:
-                dist_moon = (lord_house_lagna - moon_house) % 12
-                if dist_moon in [0, 3, 6, 9]: # 1, 4, 7, 10 equivalent indices
-                    is_cancelled = True
-                    reason = f"Lord of debilitation sign ({lord_of_deb}) is in Kendra from Moon."
-
-            # Condition 2: Planet Exalted in this sign
-            if not is_cancelled:
-                exalted_planet = planet_exalted_in_sign.get(deb_sign)
-                if exalted_planet:
-                    ex_house_lagna = get_house(exalted_planet)
-                    
-                    if ex_house_lagna in [1, 4, 7, 10]:
-                        is_cancelled = True
-                        reason = f"Planet exalted in this sign ({exalted_planet}) is in Kendra."
-                        
-                    if not is_cancelled and moon_house and ex_house_lagna:
-                        dist_moon = (ex_house_lagna - moon_house) % 12
-                        if dist_moon in [0, 3, 6, 9]:
-                            is_cancelled = True
-                            reason = f"Planet exalted in this sign ({exalted_planet}) is in Kendra from Moon."
-                            
-            if is_cancelled:
-                yogas.append({
-                    "name": "Neech Bhanga Raja Yoga",
-                    "desc": f"{planet} is debilitated in {p_sign}, but cancelled: {reason} Converts weakness into strength."
-                })
-    # 15. Dhan Yoga (Wealth Producing Combinations)
-    # Combinations involving Lords of 1, 2, 5, 9, 11.
-    # Specifically connection between (2 and 11), (2 and 5), (2 and 9), (11 and 5), (11 and 9).
-    # Also 1st lord connection with these is Dhan/Raja.
-    
-    wealth_lords_indices = [2, 11]
-    trine_lords_indices = [1, 5, 9]
-    
-    # Check interaction between Wealth Lords and Trine Lords
-    for w in wealth_lords_indices:
-        for t in trine_lords_indices:
-             w_lord = get_lord_of_house_num(w)
-             t_lord = get_lord_of_house_num(t)
-             
-             if w_lord == t_lord: continue # Same planet ownership (e.g. Venus owns 2 and 7 for Aries? No, 2&7. But 2&9 impossible? Mercuryowns 3&6. Saturn 10&11.)
-             # Only Mercury (Gemini/Virgo) or Jupiter/Mars etc.
-             # e.g. for Cap Lagna: Saturn is 1 and 2. So Lord 1 = Lord 2. This is a Great Yoga itself.
-             
-             # If same lord: It is a self-generating yoga?
-             if w_lord == t_lord:
-                 # Skip for now to avoid redundant print, or handle as special case.
-                 pass
-             
-             # Check Conjunction
-             w_house = get_house(w_lord)
-             t_house = get_house(t_lord)
-             
-             if w_house and t_house and w_house == t_house:
-                 y_name = f"Dhan Yoga (Lords of {w} and {t})"
-                 exists = any(y['name'] == y_name for y in yogas)
-                 if not exists:
-                     yogas.append({
-                        "name": y_name,
-                        "desc": f"Conjunction of Lord of {w} (Wealth) and Lord of {t}. Indicator of significant prosperity."
-                     })
-                     
-    # Check 2nd and 11th specific relationship
-    l2 = get_lord_of_house_num(2)
-    l11 = get_lord_of_house_num(11)
-    if get_house(l2) == 11 and get_house(l11) == 2:
-         yogas.append({
-            "name": "Maha Dhan Yoga",
-            "desc": f"Exchange of signs between Lords of 2nd (Wealth) and 11th (Gains). Excellent for financial success."
-         })
-    elif get_house(l2) == 11:
-         yogas.append({
-            "name": "Dhan Yoga (2nd Lord in 11th)",
-            "desc": "Lord of Wealth is in the House of Gains. Money comes easily."
-         })
-    elif get_house(l11) == 2:
-         yogas.append({
-            "name": "Dhan Yoga (11th Lord in 2nd)",
-            "desc": "Lord of Gains is in the House of Wealth. Multiple sources of income."
-         })
-         
-    return yogas
-
 def check_manglik(chart_data):
     """
     Checks for Manglik Dosha (Mars in 1, 4, 7, 8, 12).
     Simple check from Lagna.
     """
-    d1 = chart_data.get('d1', {})
-    
-    # helper
-    def get_house(planet_name):
-        for h, planets in d1.items():
-            if planet_name in planets:
-                return int(h)
-        return None
-        
-    mars_house = get_house('Mars')
+    mars_house = chart_data.house_of('Mars')
     
     if not mars_house:
         return {"status": False, "desc": "Mars position could not be determined."}
         
-    manglik_houses = [1, 4, 7, 8, 12]
-    
-    if mars_house in manglik_houses:
+    if mars_house in MANGLIK_HOUSES:
         return {
             "status": True,
             "desc": f"Mars is in House {mars_house}. This indicates Manglik Dosha. It implies high energy in relationships and requires matching."
@@ -432,9 +163,6 @@ def get_house_analysis(chart_data):
     """
     analysis = []
     
-    # Extract data
-    d1 = chart_data['d1']
-    p_details = {p['Planet']: p for p in chart_data['planetary_details']}
     
     def analyze_planet(planet, house, sign):
         # Look up interpretatons
@@ -457,16 +185,10 @@ def get_house_analysis(chart_data):
     # Iterate over key planets
     key_planets = ['Sun', 'Moon', 'Mars', 'Mercury', 'Jupiter', 'Venus', 'Saturn', 'Rahu', 'Ketu']
     
-    # Find house for each
-    house_map = {}
-    for h, planets in d1.items():
-        for p in planets:
-            house_map[p] = int(h)
-            
     for p in key_planets:
-        if p in house_map and p in p_details:
-            h = house_map[p]
-            s = p_details[p]['Sign']
+        h = chart_data.house_of(p)
+        if h is not None:
+            s = SIGNS[chart_data.sign_of(p)]
             reading = analyze_planet(p, h, s)
             if reading:
                 analysis.append({
@@ -478,32 +200,20 @@ def get_house_analysis(chart_data):
 
     return analysis
 
-def get_mahadasha_prediction(vimshottari_data):
+def get_mahadasha_prediction(dasha):
     """
     Returns prediction for current Dasha.
+    `dasha` is the chart's DashaTimeline.
     """
-    if not vimshottari_data:
+    if not dasha:
         return {}
         
     # Find current date dasha
-    today = datetime.datetime.now().date()
-    current_dasha = None
-    
-    for d in vimshottari_data:
-        # Date format YYYY-MM-DD
-        try:
-            start = datetime.datetime.strptime(d['Start'], "%Y-%m-%d").date()
-            end = datetime.datetime.strptime(d['End'], "%Y-%m-%d").date()
-            if start <= today <= end:
-                current_dasha = d
-                break
-        except:
-            continue
+    current_dasha = dasha.index(1).at(datetime.datetime.now())
             
     if not current_dasha:
         return {"current": "Unknown", "text": "Could not determine current Dasha."}
-        
-    lord = current_dasha['Lord']
+    lord = current_dasha.lord
     
     # Generic Dasha Phals
     phal = {
@@ -522,7 +232,7 @@ def get_mahadasha_prediction(vimshottari_data):
     
     return {
         "current_lord": lord,
-        "period": f"{current_dasha['Start']} to {current_dasha['End']}",
+        "period": f"{current_dasha.start_date} to {current_dasha.end_date}",
         "prediction": prediction
     }
 
@@ -530,14 +240,7 @@ def get_nakshatra_analysis(chart_data):
     """
     Returns personality analysis based on Moon's Nakshatra.
     """
-    moon_nak = ""
-    for p in chart_data['planetary_details']:
-        if p['Planet'] == 'Moon':
-            moon_nak = p['Nakshatra'].split(' (')[0] # Remove pada info
-            break
-            
-    if not moon_nak:
-        return {}
+    moon_nak = NAKSHATRAS[chart_data.nakshatra_of('Moon')]
         
     traits = {
         "Ashwini": "You are energetic, quick, and like to start new things but may leave them unfinished. You are independent and courageous.",
@@ -579,26 +282,11 @@ def get_karmic_analysis(chart_data):
     Returns Purpose (Rahu) and Past Karma (Ketu) Analysis.
     """
     # Need to find House and Nakshatra for Rahu and Ketu
-    d1 = chart_data.get('d1', {})
-    p_details = {p['Planet']: p for p in chart_data['planetary_details']}
+    rahu_h = chart_data.house_of('Rahu')
+    ketu_h = chart_data.house_of('Ketu')
     
-    def get_house(planet):
-        for h, planets in d1.items():
-            if planet in planets:
-                return int(h)
-        return None
-        
-    def get_nakshatra_name(planet):
-        if planet in p_details:
-             # Format is "Name (Pada)" e.g. "Ashwini (1)"
-             return p_details[planet]['Nakshatra'].split(' (')[0]
-        return None
-
-    rahu_h = get_house('Rahu')
-    ketu_h = get_house('Ketu')
-    
-    rahu_nak = get_nakshatra_name('Rahu')
-    ketu_nak = get_nakshatra_name('Ketu')
+    rahu_nak = NAKSHATRAS[chart_data.nakshatra_of('Rahu')]
+    ketu_nak = NAKSHATRAS[chart_data.nakshatra_of('Ketu')]
     
     rahu_house_text = RAHU_HOUSE_PURPOSE.get(rahu_h, "Rahu's house purpose is mysterious.")
     ketu_house_text = KETU_HOUSE_KARMA.get(ketu_h, "Ketu's past karma is hidden.")
@@ -620,3 +308,54 @@ def get_karmic_analysis(chart_data):
             "nakshatra": ketu_nak
         }
     }
+
+# Report section -> (analyzer, chart parts it reads), in /analyze order.
+# Parts are astrology_utils.CHART_VIEWS names; a part no selected
+# analyzer reads is never built (e.g. Vimshottari without dasha_prediction).
+ANALYZERS = {
+    "yogas": (get_yogas, ()),
+    "house_analysis": (get_house_analysis, ()),
+    "dasha_prediction": (lambda chart_data: get_mahadasha_prediction(chart_data.dasha), ('dasha',)),
+    "nakshatra_analysis": (get_nakshatra_analysis, ('nakshatras',)),
+    "manglik": (check_manglik, ()),
+    "karmic_analysis": (get_karmic_analysis, ('nakshatras',)),
+}
+
+def parse_sections(value):
+    """
+    Section names from an include=/fields= value: a list or a comma
+    separated string. None (parameter absent) means every section; an
+    empty selection ("", " , " or []) is kept and rejected by
+    select_analyses.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return [name.strip() for name in value.split(',') if name.strip()]
+    if not isinstance(value, list) or not all(isinstance(name, str) for name in value):
+        raise ValueError("include must be a list or a comma separated string of section names")
+    return value
+
+def select_analyses(only=None):
+    """
+    (names, parts): the sections in `only` (all when None) in /analyze
+    order, and the chart parts they need.
+    """
+    if only is None:
+        only = ANALYZERS
+    unknown = [name for name in only if name not in ANALYZERS]
+    if unknown:
+        raise ValueError(f"Unknown analysis: {', '.join(unknown)}")
+    if not only:
+        raise ValueError("No analysis requested")
+    names = [name for name in ANALYZERS if name in only]
+    parts = {part for name in names for part in ANALYZERS[name][1]}
+    return names, parts
+
+def analyze_chart(chart_data, only=None):
+    """
+    /analyze report for a Chart: every section, or just those in `only`.
+    """
+    names, parts = select_analyses(only)
+    chart_data.require(parts)
+    return {name: ANALYZERS[name][0](chart_data) for name in names}
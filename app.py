@@ -1,21 +1,105 @@
-from flask import Flask, render_template, request, jsonify
-from astrology_utils import calculate_chart
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 from geopy.geocoders import Nominatim
 from geopy.exc import GeocoderTimedOut
 from astrology_utils import calculate_chart
-from analysis_utils import get_yogas, get_house_analysis, get_mahadasha_prediction, get_nakshatra_analysis, check_manglik, get_karmic_analysis
-from chat_logic import process_question
+from analysis_utils import analyze_chart, parse_sections, select_analyses
+from batch_utils import analyze_births
+from chat_logic import process_question, fragment_stats
+from transit_utils import TRANSIT_BODIES, SIGNS, get_transit_cache, transit_calendar, shani_window_at, get_shani_table, to_jd, format_jd
+from ephemeris_utils import get_table
+from gazetteer_utils import get_gazetteer, encode_key
+from timezone_utils import get_timezones, birth_params, zone_at
+from cache_utils import ChartCache, SuggestionCache
+from executor_utils import get_executor, QueueFull, JobTimeout
+from dasha_utils import MAX_DEPTH
 import datetime
+import functools
+import itertools
+import json
+import os
 
 app = Flask(__name__)
 
-# Initialize Geolocator
+# Map the precomputed ephemeris at worker boot. This only reads the header,
+# so a stale or missing file is reported here and live ephem is used instead.
+get_table()
+
+# Chart and analysis work goes through the execution layer (inline unless
+# VEDIC_EXECUTOR=process, see executor_utils); pool workers start here
+executor = get_executor()
+executor.warm()
+
+def compute_chart(*args):
+    # Cached charts are shared: views a request builds (signs, dasha and
+    # its indexes...) are kept for the next request on the same chart
+    return executor.run(calculate_chart, *args)
+
+# Shared by /get_chart, /analyze and /chat (see cache_utils for backends)
+chart_cache = ChartCache(compute_chart)
+
+# Timezone grid for births sent without 'zone' or 'tz' (see timezone_utils)
+get_timezones()
+
+# Saturn windows for /transit_calendar, built at boot rather than on the first request
+# (read from the transit backend when another worker already stored them)
+get_shani_table()
+
+def load_chart(data):
+    """
+    Chart for a request body holding a chart_id from /get_chart, the raw
+    birth params, or both (the params are used if the chart_id is unknown).
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    if data.get('chart_id'):
+        try:
+            return chart_cache.get_chart_by_id(data['chart_id'])
+        except ValueError:
+            # Expired, or handed out by another worker's memory cache
+            if not data.get('dob'):
+                raise
+    return chart_cache.get_chart(*birth_params(data))
+
+# Place suggestions come from the offline gazetteer (see gazetteer_utils);
+# Nominatim is only asked when no gazetteer is built or it has no match,
+# unless VEDIC_NOMINATIM_FALLBACK=0
+get_gazetteer()
+NOMINATIM_FALLBACK = os.environ.get('VEDIC_NOMINATIM_FALLBACK', '1') != '0'
 geolocator = Nominatim(user_agent="vedic_astro_app")
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
+def location_suggestions(locations):
+    suggestions = []
+    if locations:
+        for loc in locations:
+            suggestions.append({
+                'display_name': loc.address,
+                'lat': loc.latitude,
+                'lon': loc.longitude,
+                'timezone': zone_at(loc.latitude, loc.longitude)
+            })
+    return suggestions
+
+def nominatim_suggestions(query):
+    # Blocking network call; limited and rate-limited upstream
+    locations = geolocator.geocode(query, exactly_one=False, limit=20, language='en')
+    return location_suggestions(locations)
+
+def lookup_places(key, query, limit):
+    # Upstream of suggestion_cache: gazetteer first, then Nominatim with
+    # the query as typed (the key is folded and cut to KEY_WIDTH)
+    gazetteer = get_gazetteer()
+    matches, complete = gazetteer.matches(key, limit) if gazetteer is not None else ([], False)
+    if not matches and NOMINATIM_FALLBACK:
+        return [((), 0, place) for place in nominatim_suggestions(query)], False
+    return matches, complete
+
+# Keystrokes of one place name share a single upstream lookup
+suggestion_cache = SuggestionCache(lookup_places, encode_key, limit=20)
+
 @app.route('/suggest_place', methods=['GET'])
 def suggest_place():
     query = request.args.get('q', '')
@@ -23,44 +107,59 @@ def suggest_place():
         return jsonify([])
     
     try:
-        # Get more results and allow shorter queries
-        locations = geolocator.geocode(query, exactly_one=False, limit=20, language='en')
-        suggestions = []
-        if locations:
-            for loc in locations:
-                suggestions.append({
-                    'display_name': loc.address,
-                    'lat': loc.latitude,
-                    'lon': loc.longitude
-                    # Timezone lookup would ideally happen here or on selection.
-                    # For simplicity, we might ask the frontend to deal with timezone or use a library here.
-                    # Let's use a standard timezone approximation or ask user, but usually automation is better.
-                    # For now, we return lat/lon and we might need `timezonefinder` package for accurate TZ.
-                    # Since I didn't install `timezonefinder` yet, I'll rely on a basic offset or frontend logic if possible,
-                    # OR I will add timezonefinder to dependencies.
-                    # Let's stick to lat/lon for now and default to IST (5.5) or ask user if critical.
-                    # Actually, better to just default to 5.5 for now as the user implies Indian context ("Lagna", "Rashi"), 
-                    # but I should probably allow manual offset entry or fetch it.
-                    # I'll add a 'timezone' field to the frontend to allow manual edit, defaulting to 5.5.
-                })
-        return jsonify(suggestions)
+        return jsonify(suggestion_cache.suggest(query))
     except Exception as e:
         print(f"Error in suggest_place: {e}")
         return jsonify([])
 
+# Request handlers shared by the Flask routes below and the ASGI app in
+# asgi.py. They take the parsed JSON body and return the response payload;
+# ValueError means a bad request.
+
+def chart_payload(data):
+    dob, tob, lat, lon, tz = birth_params(data)
+    # The Chart is only rendered to strings here, at the HTTP boundary
+    chart_data = chart_cache.get_chart(dob, tob, lat, lon, tz).to_dict(name=data.get('name'))
+    # Opaque handle for /analyze and /chat (see ChartCache.chart_id)
+    chart_data['chart_id'] = chart_cache.chart_id(dob, tob, lat, lon, tz)
+    # Offset actually used, e.g. when it was resolved from a zone
+    chart_data['tz'] = tz
+    return chart_data
+
+def analysis_payload(data):
+    # Calculate Chart (chart_id or raw params), then the requested analyses
+    # ('include' or 'fields', default all six)
+    only = parse_sections(data.get('include', data.get('fields')))
+    select_analyses(only)
+    chart_data = load_chart(data)
+    return executor.run(analyze_chart, chart_data, only)
+
+def chat_payload(data):
+    question = data.get('question', '')
+    payload = data.get('chart_params') # Birth params, used when no chart_id is sent or it is unknown
+    if data.get('chart_id'):
+        payload = dict(payload if isinstance(payload, dict) else {}, chart_id=data['chart_id'])
+    
+    if not question or not payload:
+        raise ValueError("Missing inputs")
+        
+    # Chart params never change during a conversation, so this is
+    # normally a cache hit
+    chart_data = load_chart(payload)
+    
+    return executor.run(process_question, question, chart_data)
+
 @app.route('/get_chart', methods=['POST'])
 def get_chart():
     data = request.json
-    name = data.get('name')
-    dob = data.get('dob')
-    tob = data.get('tob')
-    lat = float(data.get('lat'))
-    lon = float(data.get('lon'))
-    tz = float(data.get('tz', 5.5)) # Default to IST
-    
     try:
-        chart_data = calculate_chart(name, dob, tob, lat, lon, tz)
-        return jsonify(chart_data)
+        return jsonify(chart_payload(data))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except QueueFull as e:
+        return jsonify({'error': str(e)}), 503
+    except JobTimeout as e:
+        return jsonify({'error': str(e)}), 504
     except Exception as e:
         print(f"Error in get_chart: {e}")
         return jsonify({'error': str(e)}), 500
@@ -69,33 +168,14 @@ def get_chart():
 def analyze_kundali():
     data = request.json
     try:
-        name = data.get('name')
-        dob = data.get('dob')
-        tob = data.get('tob')
-        lat = float(data.get('lat'))
-        lon = float(data.get('lon'))
-        tz = float(data.get('tz', 5.5))
-        
-        # Calculate Chart
-        chart_data = calculate_chart(name, dob, tob, lat, lon, tz)
-        
-        # Perform Analysis
-        yogas = get_yogas(chart_data)
-        house_analysis = get_house_analysis(chart_data)
-        dasha_pred = get_mahadasha_prediction(chart_data.get('vimshottari', []))
-        nak_analysis = get_nakshatra_analysis(chart_data)
-        manglik_dosha = check_manglik(chart_data)
-        karmic_analysis = get_karmic_analysis(chart_data)
-        
-        response = {
-            "yogas": yogas,
-            "house_analysis": house_analysis,
-            "dasha_prediction": dasha_pred,
-            "nakshatra_analysis": nak_analysis,
-            "manglik": manglik_dosha,
-            "karmic_analysis": karmic_analysis
-        }
-        return jsonify(response)
+        return jsonify(analysis_payload(data))
+    except ValueError as e:
+        # Malformed chart_id or birth params
+        return jsonify({'error': str(e)}), 400
+    except QueueFull as e:
+        return jsonify({'error': str(e)}), 503
+    except JobTimeout as e:
+        return jsonify({'error': str(e)}), 504
     except Exception as e:
         print(f"Error in analyze_kundali: {e}")
         return jsonify({'error': str(e)}), 500
@@ -103,25 +183,173 @@ def analyze_kundali():
 @app.route('/chat', methods=['POST'])
 def chat():
     try:
-        data = request.json
-        question = data.get('question', '')
-        payload = data.get('chart_params') # Full payload to recalc chart on fly or pass chart_data
+        return jsonify(chat_payload(request.json))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except QueueFull as e:
+        return jsonify({"error": str(e)}), 503
+    except JobTimeout as e:
+        return jsonify({"error": str(e)}), 504
+    except Exception as e:
+        print(f"Chat Analysis Error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+# Records per ChartBatch in /analyze_batch
+BATCH_CHUNK_SIZE = int(os.environ.get('VEDIC_BATCH_CHUNK_SIZE', 256))
+
+# Bodies /analyze_batch reads line by line as they arrive
+NDJSON_TYPES = ('application/x-ndjson', 'application/jsonl')
+
+def ndjson_records(stream):
+    # Lines that are not valid JSON are passed on as-is and reported as
+    # errors for their record
+    for line in stream:
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield line.decode('utf-8', 'replace')
+
+def batch_records():
+    """
+    Births from an /analyze_batch body: a JSON list, {"births": [...]}, or
+    NDJSON (one object per line, read as it arrives). Called before the
+    response starts, so a malformed JSON body raises ValueError here.
+    """
+    if request.mimetype in NDJSON_TYPES:
+        return ndjson_records(request.stream)
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('births')
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON list of births (or {\"births\": [...]})")
+    return iter(data)
+
+@app.route('/analyze_batch', methods=['POST'])
+def analyze_batch():
+    """
+    /analyze for many births. Streams one NDJSON line per input record,
+    in input order, as each chunk of records completes:
+    {"index": i, "name": ..., <report>} or {"index": i, "error": ...}.
+    ?include= (or ?fields=) limits the report to those sections.
+    Request-level errors (content type, body shape) are plain 4xx
+    responses; only per-record failures appear in the stream.
+    """
+    if request.mimetype not in NDJSON_TYPES and not request.is_json:
+        return jsonify({'error': "Send application/json or application/x-ndjson"}), 415
+    try:
+        only = parse_sections(request.args.get('include', request.args.get('fields')))
+        select_analyses(only)
+        records = chart_cache.resolve_ids(batch_records())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    job = functools.partial(analyze_births, only=only)
+
+    def generate():
+        index = 0
+        try:
+            for report in executor.map_batches(job, records, BATCH_CHUNK_SIZE, executor.timeout):
+                yield app.json.dumps(dict(report, index=index), separators=(',', ':')) + '\n'
+                index += 1
+        except Exception as e:
+            # Stream already started: report and stop
+            print(f"Error in analyze_batch: {e}")
+            yield app.json.dumps({'index': index, 'error': str(e), 'fatal': True}, separators=(',', ':')) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+# Most periods one /dashas response may hold
+MAX_DASHA_PERIODS = 5000
+
+@app.route('/dashas', methods=['POST'])
+def dasha_window():
+    """
+    Dasha periods down to Pratyantar/Sookshma (or deeper) for a date window.
+    Body: chart_id or birth params, plus 'from', 'to' (YYYY-MM-DD) and 'depth'.
+    Windows holding more than MAX_DASHA_PERIODS periods are rejected.
+    """
+    data = request.json
+    try:
+        depth = int(data.get('depth', 3))
+        if not 1 <= depth <= MAX_DEPTH:
+            return jsonify({'error': f"depth must be between 1 and {MAX_DEPTH}"}), 400
         
-        if not question or not payload:
-            return jsonify({"error": "Missing inputs"}), 400
-            
-        # Recalculate chart (stateless)
-        chart_data = calculate_chart(
-            payload['name'], payload['dob'], payload['tob'], 
-            float(payload['lat']), float(payload['lon']), float(payload['tz'])
-        )
+        today = datetime.date.today()
+        start = datetime.datetime.strptime(data['from'], "%Y-%m-%d").date() if data.get('from') else today
+        end = datetime.datetime.strptime(data['to'], "%Y-%m-%d").date() if data.get('to') else today + datetime.timedelta(days=365)
+        if not start < end:
+            return jsonify({'error': "'to' must be after 'from'"}), 400
         
-        result = process_question(question, chart_data)
+        dasha = load_chart(data).dasha
+        # Periods are generated lazily, so stopping one past the cap bounds
+        # the work as well as the payload
+        periods = list(itertools.islice(dasha.periods_between(start, end, depth), MAX_DASHA_PERIODS + 1))
+        if len(periods) > MAX_DASHA_PERIODS:
+            return jsonify({'error': f"Window holds more than {MAX_DASHA_PERIODS} periods at depth {depth}; narrow it or use a lower depth"}), 400
+        return jsonify([p.to_dict() for p in periods])
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except QueueFull as e:
+        return jsonify({'error': str(e)}), 503
+    except JobTimeout as e:
+        return jsonify({'error': str(e)}), 504
+    except Exception as e:
+        print(f"Error in dasha_window: {e}")
+        return jsonify({'error': str(e)}), 500
+
+# Longest /transit_calendar window, in years
+MAX_CALENDAR_YEARS = 10
+
+@app.route('/transit_calendar', methods=['POST'])
+def transit_window():
+    """
+    Sign ingresses and retrograde/direct stations for a date window.
+    Body: 'from', 'to' (YYYY-MM-DD, default the next year), optional
+    'planets', and optionally a chart_id or birth params to also get the
+    Sade Sati, Dhaiya and Ashtama Shani windows overlapping the window for
+    its Moon sign, and the one running now.
+    """
+    data = request.json or {}
+    try:
+        today = datetime.date.today()
+        start = datetime.datetime.strptime(data['from'], "%Y-%m-%d").date() if data.get('from') else today
+        end = datetime.datetime.strptime(data['to'], "%Y-%m-%d").date() if data.get('to') else today + datetime.timedelta(days=365)
+        if not start < end or (end - start).days > MAX_CALENDAR_YEARS * 366:
+            return jsonify({'error': f"'to' must be after 'from' and at most {MAX_CALENDAR_YEARS} years later"}), 400
+        planets = data.get('planets')
+        if planets is not None and not isinstance(planets, list):
+            return jsonify({'error': "planets must be a list"}), 400
+        unknown = [p for p in planets or [] if p not in TRANSIT_BODIES]
+        if unknown:
+            return jsonify({'error': f"Unknown planet: {', '.join(map(str, unknown))}"}), 400
+
+        result = {'events': [
+            {'date': format_jd(jd), 'planet': planet, 'type': kind, 'sign': SIGNS[sign]}
+            for jd, planet, kind, sign in transit_calendar(start, end, planets)
+        ]}
+        if data.get('chart_id') or data.get('dob'):
+            moon_sign = load_chart(data).moon_sign
+            current = shani_window_at(moon_sign)
+            result['moon_sign'] = SIGNS[moon_sign]
+            lo, hi = to_jd(start), to_jd(end)
+            result['shani'] = {
+                name: [{'start': format_jd(a), 'end': format_jd(b)} for a, b in intervals if a < hi and b > lo]
+                for name, intervals in get_shani_table()[moon_sign].items()
+            }
+            result['shani_now'] = current and {'window': current[0], 'start': format_jd(current[1]), 'end': format_jd(current[2])}
         return jsonify(result)
-        
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print(f"Chat Analysis Error: {e}")
-        return jsonify({"error": str(e)}), 500
+        print(f"Error in transit_window: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/cache_stats', methods=['GET'])
+def cache_stats():
+    # Counters are per worker process
+    return jsonify(dict(chart_cache.stats(), suggestions=suggestion_cache.stats(),
+                        transits=get_transit_cache().stats(), answers=fragment_stats()))
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
@@ -0,0 +1,147 @@
+import asyncio
+import concurrent.futures
+import json
+import os
+import urllib.parse
+
+from asgiref.wsgi import WsgiToAsgi
+from geopy.adapters import AioHTTPAdapter
+from geopy.geocoders import Nominatim
+
+import app as web
+from gazetteer_utils import get_gazetteer
+from executor_utils import QueueFull, JobTimeout
+
+# ASGI serving mode, alongside the WSGI app:app.
+#
+#   uvicorn asgi:app --workers 4
+#   gunicorn -k uvicorn.workers.UvicornWorker asgi:app
+#
+# /suggest_place, /get_chart, /analyze and /chat are served natively: place
+# lookups never block the event loop (Nominatim is called through aiohttp)
+# and chart/analysis work runs on a bounded thread pool, so a slow geocode
+# does not hold up cheap chart requests. Every other route (pages, static
+# files, /dashas, /cache_stats) is passed to the Flask app.
+
+THREADS = int(os.environ.get('VEDIC_ASGI_THREADS', min(32, (os.cpu_count() or 1) + 4)))
+# Jobs allowed to queue or run on the pool before new requests wait
+MAX_PENDING = int(os.environ.get('VEDIC_ASGI_MAX_PENDING', THREADS * 4))
+
+class BoundedExecutor:
+    """
+    Thread pool for blocking work with at most `max_pending` jobs queued or
+    running; callers beyond that wait for a slot without blocking the loop.
+    """
+
+    def __init__(self, workers=THREADS, max_pending=MAX_PENDING):
+        self.pool = concurrent.futures.ThreadPoolExecutor(workers, thread_name_prefix='vedic')
+        self.slots = asyncio.Semaphore(max_pending)
+
+    async def run(self, func, *args):
+        async with self.slots:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, func, *args)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+executor = BoundedExecutor()
+flask_app = WsgiToAsgi(web.app)
+geolocator = None
+
+async def nominatim_suggestions(query):
+    global geolocator
+    if geolocator is None:
+        geolocator = Nominatim(user_agent="vedic_astro_app", adapter_factory=AioHTTPAdapter)
+    locations = await geolocator.geocode(query, exactly_one=False, limit=20, language='en')
+    return web.location_suggestions(locations)
+
+async def lookup_places(key, query, limit):
+    # Async twin of app.lookup_places; the gazetteer lookup is sub-millisecond
+    gazetteer = get_gazetteer()
+    matches, complete = gazetteer.matches(key, limit) if gazetteer is not None else ([], False)
+    if not matches and web.NOMINATIM_FALLBACK:
+        places = await nominatim_suggestions(query)
+        return [((), 0, place) for place in places], False
+    return matches, complete
+
+async def send_json(send, payload, status=200):
+    # Same encoding as flask.jsonify outside debug mode
+    body = (web.app.json.dumps(payload, separators=(',', ':')) + '\n').encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+async def read_json(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    return json.loads(b''.join(chunks) or b'null')
+
+async def suggest_place(scope, receive, send):
+    params = urllib.parse.parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    query = params.get('q', [''])[0]
+    if not query:
+        return await send_json(send, [])
+
+    try:
+        await send_json(send, await web.suggestion_cache.suggest_async(query, lookup_places))
+    except Exception as e:
+        print(f"Error in suggest_place: {e}")
+        await send_json(send, [])
+
+def json_endpoint(handler, label):
+    """
+    ASGI handler running one of app.py's *_payload functions on the pool,
+    with the same error mapping as the Flask routes.
+    """
+    async def endpoint(scope, receive, send):
+        try:
+            data = await read_json(receive)
+            if not isinstance(data, dict):
+                raise ValueError("Expected a JSON object")
+            await send_json(send, await executor.run(handler, data))
+        except ValueError as e:
+            await send_json(send, {'error': str(e)}, 400)
+        except QueueFull as e:
+            await send_json(send, {'error': str(e)}, 503)
+        except JobTimeout as e:
+            await send_json(send, {'error': str(e)}, 504)
+        except Exception as e:
+            print(f"Error in {label}: {e}")
+            await send_json(send, {'error': str(e)}, 500)
+    return endpoint
+
+ROUTES = {
+    ('GET', '/suggest_place'): suggest_place,
+    ('POST', '/get_chart'): json_endpoint(web.chart_payload, 'get_chart'),
+    ('POST', '/analyze'): json_endpoint(web.analysis_payload, 'analyze_kundali'),
+    ('POST', '/chat'): json_endpoint(web.chat_payload, 'chat'),
+}
+
+async def lifespan(receive, send):
+    global geolocator
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if geolocator is not None:
+                await geolocator.__aexit__(None, None, None)
+                geolocator = None
+            executor.shutdown()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    handler = ROUTES.get((scope.get('method'), scope.get('path')))
+    if handler is None:
+        return await flask_app(scope, receive, send)
+    await handler(scope, receive, send)
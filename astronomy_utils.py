@@ -0,0 +1,165 @@
+import functools
+import os
+import numpy as np
+
+from ephemeris_utils import BODIES, get_tropical_longitude, get_body_longitudes, get_tropical_longitudes
+
+# Shared astronomical core for the natal and transit code: time scales,
+# precession, the Lahiri ayanamsa and the lunar nodes, as NumPy-friendly
+# functions of the UT Julian date (scalars or arrays).
+#
+# The ephemeris (table or live ephem) gives tropical longitudes on the
+# J2000 ecliptic. Precessed to the equinox of date they become
+# lon + p_A(T), and the Lahiri ayanamsa is itself the precession since its
+# 1956 reference, so the sidereal longitude is lon - ayanamsa(J2000) for
+# every date. The nodes and the Ascendant are referred to the equinox of
+# date and take ayanamsa(T).
+#
+# Rahu is the mean node unless VEDIC_NODE=true.
+
+NODE = os.environ.get('VEDIC_NODE', 'mean')
+
+# Sun..Saturn, then the nodes
+SIDEREAL_BODIES = list(BODIES) + ['Rahu', 'Ketu']
+
+J2000 = 2451545.0
+ARCSEC = 1.0 / 3600.0
+
+# Lahiri (Chitrapaksha) reference: 23 15' 00.658" true, 23.245524743 mean,
+# at 1956-03-21 0h TT (Indian Astronomical Ephemeris definition)
+LAHIRI_EPOCH = 2435553.5
+LAHIRI_AT_EPOCH = 23.245524743
+
+def delta_t(jd):
+    """
+    TT - UT in seconds (Espenak & Meeus polynomials, 1600-2150; the
+    long-term parabola outside).
+    """
+    y = 2000.0 + (np.asarray(jd, dtype=np.float64) - J2000) / 365.25
+    u = (y - 1820.0) / 100.0
+    long_term = -20.0 + 32.0 * u * u
+
+    t = y - 1600.0
+    c1600 = 120.0 - 0.9808 * t - 0.01532 * t ** 2 + t ** 3 / 7129.0
+    t = y - 1700.0
+    c1700 = 8.83 + 0.1603 * t - 0.0059285 * t ** 2 + 0.00013336 * t ** 3 - t ** 4 / 1174000.0
+    t = y - 1800.0
+    c1800 = (13.72 - 0.332447 * t + 0.0068612 * t ** 2 + 0.0041116 * t ** 3 - 0.00037436 * t ** 4
+             + 0.0000121272 * t ** 5 - 0.0000001699 * t ** 6 + 0.000000000875 * t ** 7)
+    t = y - 1860.0
+    c1860 = 7.62 + 0.5737 * t - 0.251754 * t ** 2 + 0.01680668 * t ** 3 - 0.0004473624 * t ** 4 + t ** 5 / 233174.0
+    t = y - 1900.0
+    c1900 = -2.79 + 1.494119 * t - 0.0598939 * t ** 2 + 0.0061966 * t ** 3 - 0.000197 * t ** 4
+    t = y - 1920.0
+    c1920 = 21.20 + 0.84493 * t - 0.076100 * t ** 2 + 0.0020936 * t ** 3
+    t = y - 1950.0
+    c1941 = 29.07 + 0.407 * t - t ** 2 / 233.0 + t ** 3 / 2547.0
+    t = y - 1975.0
+    c1961 = 45.45 + 1.067 * t - t ** 2 / 260.0 - t ** 3 / 718.0
+    t = y - 2000.0
+    c1986 = (63.86 + 0.3345 * t - 0.060374 * t ** 2 + 0.0017275 * t ** 3 + 0.000651814 * t ** 4
+             + 0.00002373599 * t ** 5)
+    c2005 = 62.92 + 0.32217 * t + 0.005589 * t ** 2
+    c2050 = long_term - 0.5628 * (2150.0 - y)
+
+    result = np.select(
+        [y < 1600, y < 1700, y < 1800, y < 1860, y < 1900, y < 1920, y < 1941,
+         y < 1961, y < 1986, y < 2005, y < 2050, y < 2150],
+        [long_term, c1600, c1700, c1800, c1860, c1900, c1920, c1941,
+         c1961, c1986, c2005, c2050],
+        long_term)
+    return result if result.ndim else float(result)
+
+def centuries_tt(jd):
+    # Julian centuries of TT from J2000 for a UT Julian date
+    return (jd + delta_t(jd) / 86400.0 - J2000) / 36525.0
+
+def general_precession(t):
+    # Accumulated precession in longitude since J2000 (degrees), IAU 2006 p_A
+    return (5028.796195 * t + 1.1054348 * t ** 2 + 0.00007964 * t ** 3
+            - 0.000023857 * t ** 4 - 0.0000000383 * t ** 5) * ARCSEC
+
+LAHIRI_J2000 = LAHIRI_AT_EPOCH - general_precession((LAHIRI_EPOCH - J2000) / 36525.0)
+
+def lahiri_ayanamsa(jd):
+    """
+    Mean Lahiri ayanamsa (degrees) at a UT Julian date.
+    """
+    return LAHIRI_J2000 + general_precession(centuries_tt(jd))
+
+def lunar_arguments(t):
+    # Meeus ch. 47: Moon's elongation D, Sun's anomaly M, Moon's anomaly M'
+    # and argument of latitude F (radians) at TT centuries t
+    d = 297.8501921 + 445267.1114034 * t - 0.0018819 * t ** 2 + t ** 3 / 545868.0
+    m = 357.5291092 + 35999.0502909 * t - 0.0001536 * t ** 2 + t ** 3 / 24490000.0
+    mp = 134.9633964 + 477198.8675055 * t + 0.0087414 * t ** 2 + t ** 3 / 69699.0
+    f = 93.2720950 + 483202.0175233 * t - 0.0036539 * t ** 2 - t ** 3 / 3526000.0
+    return np.radians(d), np.radians(m), np.radians(mp), np.radians(f)
+
+def mean_node(jd):
+    """
+    Tropical longitude (degrees, equinox of date) of the mean ascending
+    node of the Moon, Meeus ch. 47.
+    """
+    t = centuries_tt(jd)
+    return (125.0445479 - 1934.1362891 * t + 0.0020754 * t ** 2
+            + t ** 3 / 467441.0 - t ** 4 / 60616000.0) % 360
+
+def true_node(jd):
+    """
+    Tropical longitude (degrees, equinox of date) of the true ascending
+    node: the mean node plus its main periodic terms.
+    """
+    d, m, mp, f = lunar_arguments(centuries_tt(jd))
+    correction = (-1.4979 * np.sin(2 * (d - f)) - 0.1500 * np.sin(m) - 0.1226 * np.sin(2 * d)
+                  + 0.1176 * np.sin(2 * f) - 0.0801 * np.sin(2 * (f - mp)))
+    return (mean_node(jd) + correction) % 360
+
+def rahu(jd):
+    return true_node(jd) if NODE == 'true' else mean_node(jd)
+
+def sidereal_longitude(name, jd):
+    """
+    Sidereal longitude of one of SIDEREAL_BODIES at a UT Julian date.
+    """
+    if name == 'Rahu':
+        return float(rahu(jd) - lahiri_ayanamsa(jd)) % 360
+    if name == 'Ketu':
+        return float(rahu(jd) - lahiri_ayanamsa(jd) + 180) % 360
+    return (get_tropical_longitude(name, jd) - LAHIRI_J2000) % 360
+
+def sidereal_longitudes(name, jd):
+    """
+    sidereal_longitude for an array of Julian dates.
+    """
+    jd = np.asarray(jd, dtype=np.float64)
+    if name in ('Rahu', 'Ketu'):
+        node = rahu(jd) - lahiri_ayanamsa(jd)
+        return (node + (180 if name == 'Ketu' else 0)) % 360
+    return (get_body_longitudes(name, jd) - LAHIRI_J2000) % 360
+
+@functools.lru_cache(maxsize=4096)
+def sidereal_instant(jd):
+    # Every SIDEREAL_BODIES longitude at one instant, cached per instant
+    node = float(rahu(jd) - lahiri_ayanamsa(jd)) % 360
+    lons = [(get_tropical_longitude(name, jd) - LAHIRI_J2000) % 360 for name in BODIES]
+    return tuple(lons) + (node, (node + 180) % 360)
+
+def get_sidereal_positions(jd):
+    """
+    Sidereal longitudes at a single Julian date: {'Sun': lon, ..., 'Ketu': lon}
+    """
+    return dict(zip(SIDEREAL_BODIES, sidereal_instant(float(jd))))
+
+def get_sidereal_longitudes(jd):
+    """
+    Sidereal longitudes of SIDEREAL_BODIES for an array of Julian dates,
+    shape (len(jd), len(SIDEREAL_BODIES)).
+    """
+    jd = np.asarray(jd, dtype=np.float64)
+    out = np.empty((len(jd), len(SIDEREAL_BODIES)))
+    out[:, :len(BODIES)] = (get_tropical_longitudes(jd) - LAHIRI_J2000) % 360
+    node = (rahu(jd) - lahiri_ayanamsa(jd)) % 360
+    out[:, len(BODIES)] = node
+    out[:, len(BODIES) + 1] = (node + 180) % 360
+    return out
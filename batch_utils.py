@@ -0,0 +1,144 @@
+import math
+import datetime
+import numpy as np
+
+from astrology_utils import Chart, OBLIQUITY, CHART_BODIES
+from astronomy_utils import lahiri_ayanamsa, mean_node, get_sidereal_longitudes
+from analysis_utils import analyze_chart
+from cache_utils import normalize_birth
+from timezone_utils import birth_params
+
+ONE_STAR = 360.0 / 27.0
+UNIX_EPOCH_JD = 2440587.5
+
+def to_julian_dates(dates, times, tz_offsets):
+    """
+    Converts arrays of local 'YYYY-MM-DD' dates, 'HH:MM' times and GMT offsets
+    (hours) to UT Julian dates.
+    """
+    stamps = np.char.add(np.char.add(np.asarray(dates, dtype=str), 'T'), np.asarray(times, dtype=str))
+    local = stamps.astype('datetime64[s]')
+    offsets = np.rint(np.asarray(tz_offsets, dtype=float) * 3600).astype('timedelta64[s]')
+    utc = local - offsets
+    seconds = (utc - np.datetime64('1970-01-01T00:00:00', 's')).astype(np.float64)
+    return seconds / 86400.0 + UNIX_EPOCH_JD
+
+def get_sidereal_times(jd, lons):
+    # Local apparent sidereal time (radians) from UT Julian dates and east
+    # longitudes, matching ephem's Observer.sidereal_time()
+    t = (jd - 2451545.0) / 36525.0
+    gmst = (280.46061837 + 360.98564736629 * (jd - 2451545.0)
+            + 0.000387933 * t * t - t * t * t / 38710000.0)
+
+    # Equation of the equinoxes (nutation in longitude, main terms, arcsec)
+    omega = np.radians(mean_node(jd))
+    sun_l = np.radians(280.4665 + 36000.7698 * t)
+    moon_l = np.radians(218.3165 + 481267.8813 * t)
+    dpsi = (-17.20 * np.sin(omega) - 1.32 * np.sin(2 * sun_l)
+            - 0.23 * np.sin(2 * moon_l) + 0.21 * np.sin(2 * omega))
+    eqeq = dpsi / 3600.0 * math.cos(math.radians(OBLIQUITY))
+
+    return np.radians((gmst + eqeq + lons) % 360)
+
+def get_ascendants(ramc, lats):
+    # NumPy version of astrology_utils.get_ascendant
+    eps = math.radians(OBLIQUITY)
+    latitude = np.radians(lats)
+    y = -np.cos(ramc)
+    x = np.sin(ramc) * math.cos(eps) + np.tan(latitude) * math.sin(eps)
+    return (np.degrees(np.arctan2(y, x)) + 180) % 360
+
+class ChartBatch:
+    """
+    Columnar result of calculate_charts. Every array has one row per birth;
+    per-planet arrays have one column per CHART_BODIES entry.
+    """
+
+    def __init__(self, dates, times, jd, ayanamsa, asc, lons):
+        self.dates = dates
+        self.times = times
+        self.jd = jd
+        self.ayanamsa = ayanamsa
+        self.asc = asc
+        self.lons = lons
+
+        self.asc_sign = (asc // 30).astype(np.int8)
+        self.signs = (lons // 30).astype(np.int8)
+        self.houses = ((self.signs - self.asc_sign[:, None]) % 12 + 1).astype(np.int8)
+
+        self.nakshatras = (lons // ONE_STAR).astype(np.int8)
+        self.padas = ((lons % ONE_STAR) / ONE_STAR * 4).astype(np.int8) + 1
+
+    def __len__(self):
+        return len(self.jd)
+
+    def chart(self, i, name=None):
+        """
+        Builds the calculate_chart style Chart for row i.
+        """
+        date_str = str(self.dates[i])
+        time_str = str(self.times[i])
+        local_dt = datetime.datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
+        lons = [float(self.asc[i])] + self.lons[i].tolist()
+        return Chart(name, date_str, time_str, local_dt, lons)
+
+    def charts(self, names=None):
+        for i in range(len(self)):
+            yield self.chart(i, names[i] if names is not None else None)
+
+def calculate_charts(dates, times, lats, lons, tz_offsets):
+    """
+    Vectorized calculate_chart for many births at once.
+    Takes equal-length sequences and returns a ChartBatch.
+    """
+    dates = np.asarray(dates, dtype=str)
+    times = np.asarray(times, dtype=str)
+    lats = np.asarray(lats, dtype=float)
+    lons = np.asarray(lons, dtype=float)
+
+    jd = to_julian_dates(dates, times, tz_offsets)
+    ayanamsa = lahiri_ayanamsa(jd)
+
+    asc_trop = get_ascendants(get_sidereal_times(jd, lons), lats)
+    asc = (asc_trop - ayanamsa) % 360
+
+    # Sun..Saturn followed by Rahu and Ketu, matching CHART_BODIES
+    positions = get_sidereal_longitudes(jd)
+
+    return ChartBatch(dates, times, jd, ayanamsa, asc, positions)
+
+def analyze_births(records, only=None):
+    """
+    /analyze reports for a list of birth records (request bodies with
+    birth params or a chart_id), computed as one ChartBatch. chart_ids
+    must already be resolved (ChartCache.resolve_ids); one still here with
+    no birth params is an error for its record. Returns one
+    dict per record, in order: the report (sections in `only`, default
+    all), or {'error': ...} for a record that could not be used, each with
+    the record's 'name'.
+    """
+    results = [None] * len(records)
+    rows = []
+    params = []
+    for i, record in enumerate(records):
+        try:
+            if not isinstance(record, dict):
+                results[i] = {'name': None, 'error': "Expected a JSON object"}
+                continue
+            if record.get('chart_id') and not record.get('dob'):
+                raise ValueError("Unknown or expired chart_id")
+            params.append(normalize_birth(*birth_params(record)))
+            rows.append(i)
+        except Exception as e:
+            results[i] = {'name': record.get('name'), 'error': str(e)}
+
+    if rows:
+        dates, times, lats, lons, tzs = zip(*params)
+        batch = calculate_charts(dates, times, lats, lons, tzs)
+        for k, i in enumerate(rows):
+            name = records[i].get('name')
+            try:
+                results[i] = dict(analyze_chart(batch.chart(k, name), only), name=name)
+            except Exception as e:
+                results[i] = {'name': name, 'error': str(e)}
+    return results
@@ -0,0 +1,156 @@
+import argparse
+import csv
+import functools
+import itertools
+import json
+import sys
+
+from analysis_utils import ANALYZERS
+from astrology_utils import calculate_chart
+from batch_utils import analyze_births
+from cache_utils import ChartCache
+from executor_utils import Executor, WORKERS, CHUNK_SIZE
+
+# Bulk chart analysis, streamed so memory stays flat however long the input:
+#   python bulk.py births.csv --workers 8 --only yogas,manglik > reports.ndjson
+#   cat births.ndjson | python bulk.py - --output-format csv > reports.csv
+#
+# Input is CSV (header row) or NDJSON, from a file or stdin; each record has
+# name, dob (YYYY-MM-DD), tob (HH:MM), lat, lon and tz (hours) or zone (IANA
+# name), or a chart_id. With neither tz nor zone the zone at lat/lon is used.
+# chart_ids are looked up in VEDIC_CHART_CACHE, so they only resolve here
+# when the server uses a shared (sqlite or redis) backend.
+#
+# Pipeline: read records -> chunks of --chunk-size -> one ChartBatch and the
+# selected analyses per chunk on the worker pool -> write, in input order.
+# Output formats:
+#   ndjson   one report per line, with 'index' and 'name'
+#   csv      one row per record, flattened to CSV_COLUMNS
+#   columns  one line per chunk holding a list per column (row groups)
+# Records that fail carry an 'error' instead of the report.
+
+def join_names(items):
+    return '; '.join(item['name'] for item in items)
+
+# Analysis -> flat (column, getter) pairs for the csv and columns formats
+CSV_COLUMNS = {
+    "yogas": [("yogas", join_names)],
+    "house_analysis": [("house_analysis", lambda v: json.dumps(v, ensure_ascii=False))],
+    "dasha_prediction": [
+        ("dasha_lord", lambda v: v.get('current_lord', v.get('current'))),
+        ("dasha_period", lambda v: v.get('period')),
+        ("dasha_prediction", lambda v: v.get('prediction', v.get('text'))),
+    ],
+    "nakshatra_analysis": [
+        ("nakshatra", lambda v: v.get('nakshatra')),
+        ("nakshatra_traits", lambda v: v.get('traits')),
+    ],
+    "manglik": [
+        ("manglik", lambda v: v['status']),
+        ("manglik_desc", lambda v: v['desc']),
+    ],
+    "karmic_analysis": [
+        ("rahu_house", lambda v: v['rahu']['house']),
+        ("rahu_nakshatra", lambda v: v['rahu']['nakshatra']),
+        ("ketu_house", lambda v: v['ketu']['house']),
+        ("ketu_nakshatra", lambda v: v['ketu']['nakshatra']),
+    ],
+}
+
+def read_records(source, input_format='auto'):
+    """
+    Yields one dict per CSV row or NDJSON line. NDJSON lines that are not
+    valid JSON are yielded as strings and reported as errors downstream.
+    """
+    lines = iter(source)
+    if input_format == 'auto':
+        first = next(lines, '')
+        input_format = 'ndjson' if first.lstrip().startswith('{') else 'csv'
+        lines = itertools.chain([first], lines)
+
+    if input_format == 'csv':
+        yield from csv.DictReader(lines)
+        return
+    for line in lines:
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield line
+
+def flat_row(report, only):
+    row = {'index': report['index'], 'name': report.get('name'), 'error': report.get('error')}
+    if 'error' not in report:
+        for name in only:
+            for column, get in CSV_COLUMNS[name]:
+                row[column] = get(report[name])
+    return row
+
+def write_ndjson(reports, out, only, chunk_size):
+    for report in reports:
+        out.write(json.dumps(report, ensure_ascii=False, default=str) + '\n')
+
+def write_csv(reports, out, only, chunk_size):
+    columns = ['index', 'name', 'error'] + [c for name in only for c, _ in CSV_COLUMNS[name]]
+    writer = csv.DictWriter(out, columns)
+    writer.writeheader()
+    for report in reports:
+        writer.writerow(flat_row(report, only))
+
+def write_columns(reports, out, only, chunk_size):
+    columns = ['index', 'name', 'error'] + [c for name in only for c, _ in CSV_COLUMNS[name]]
+    while True:
+        rows = [flat_row(report, only) for report in itertools.islice(reports, chunk_size)]
+        if not rows:
+            return
+        chunk = {c: [row.get(c) for row in rows] for c in columns}
+        out.write(json.dumps(chunk, ensure_ascii=False, default=str) + '\n')
+
+WRITERS = {'ndjson': write_ndjson, 'csv': write_csv, 'columns': write_columns}
+
+def run(source, out, only, workers=WORKERS, chunk_size=CHUNK_SIZE,
+        input_format='auto', output_format='ndjson'):
+    executor = Executor('process' if workers > 1 else 'inline', workers)
+    executor.warm()
+    try:
+        records = ChartCache(calculate_chart).resolve_ids(read_records(source, input_format))
+        job = functools.partial(analyze_births, only=only)
+        reports = (dict(report, index=i) for i, report in
+                   enumerate(executor.map_batches(job, records, chunk_size)))
+        WRITERS[output_format](reports, out, only, chunk_size)
+    finally:
+        executor.shutdown()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze births from CSV or NDJSON, streaming reports out.")
+    parser.add_argument('input', nargs='?', default='-', help="CSV/NDJSON file, or - for stdin")
+    parser.add_argument('-o', '--output', default='-', help="output file, or - for stdout")
+    parser.add_argument('--workers', type=int, default=WORKERS, help="worker processes (1 runs inline)")
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help="records per batch and per columns line")
+    parser.add_argument('--only', default=None,
+                        help="comma separated analyses to run: " + ','.join(ANALYZERS))
+    parser.add_argument('--input-format', choices=['auto', 'csv', 'ndjson'], default='auto')
+    parser.add_argument('--output-format', choices=sorted(WRITERS), default='ndjson')
+    args = parser.parse_args(argv)
+
+    only = [name.strip() for name in args.only.split(',') if name.strip()] if args.only else list(ANALYZERS)
+    unknown = [name for name in only if name not in ANALYZERS]
+    if unknown:
+        parser.error(f"unknown analysis: {', '.join(unknown)}")
+
+    source = sys.stdin if args.input == '-' else open(args.input, newline='', encoding='utf-8')
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', newline='', encoding='utf-8')
+    try:
+        run(source, out, only, args.workers, args.chunk_size, args.input_format, args.output_format)
+    except BrokenPipeError:
+        # Output closed early (e.g. piped into head)
+        sys.stderr.close()
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,440 @@
+import asyncio
+import base64
+import collections
+import concurrent.futures
+import datetime
+import hashlib
+import hmac
+import math
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+# Chart cache shared by /get_chart, /analyze and /chat.
+#
+# Charts are keyed on the normalized (dob, tob, lat, lon, tz) tuple, so the
+# same birth data always maps to the same entry whatever name it was sent
+# with. The storage backend is chosen with VEDIC_CHART_CACHE:
+#   memory (default)        per-process LRU dict
+#   sqlite:///path/to.db    local file shared by all workers on the host
+#   local-redis             in-process stand-in with the Redis interface
+#   redis://host:port/db    a real Redis server (needs the redis package)
+
+DEFAULT_SIZE = int(os.environ.get('VEDIC_CHART_CACHE_SIZE', 1024))
+DEFAULT_TTL = float(os.environ.get('VEDIC_CHART_CACHE_TTL', 3600))
+
+# Place suggestions (per process; the gazetteer itself is shared via mmap)
+SUGGEST_SIZE = int(os.environ.get('VEDIC_SUGGEST_CACHE_SIZE', 4096))
+SUGGEST_TTL = float(os.environ.get('VEDIC_SUGGEST_CACHE_TTL', 86400))
+
+# chart_id handles from /get_chart. The birth data behind a handle is kept
+# in the chart cache backend; workers only hand out equal ids for equal
+# births when they share VEDIC_CHART_ID_SECRET (random per process if unset)
+CHART_ID_TTL = float(os.environ.get('VEDIC_CHART_ID_TTL', 30 * 86400))
+CHART_ID_SECRET = os.environ.get('VEDIC_CHART_ID_SECRET', '').encode() or os.urandom(32)
+
+class MemoryBackend:
+    """
+    Thread-safe LRU dict with per-entry expiry. Values are stored as-is.
+    """
+
+    def __init__(self, max_entries=DEFAULT_SIZE):
+        self.max_entries = max_entries
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires < time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.time() + ttl if ttl else None
+        with self.lock:
+            self.entries[key] = (value, expires)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def __len__(self):
+        return len(self.entries)
+
+class SQLiteBackend:
+    """
+    LRU store in a local SQLite file, shared by every worker on the host.
+    Values are pickled.
+    """
+
+    def __init__(self, path, max_entries=DEFAULT_SIZE):
+        self.path = path
+        self.max_entries = max_entries
+        self.local = threading.local()
+        with self.connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value BLOB, expires REAL, used REAL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_used ON cache (used)")
+
+    def connect(self):
+        # sqlite3 connections cannot be shared between threads
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self.local.conn = conn
+        return conn
+
+    def get(self, key):
+        conn = self.connect()
+        now = time.time()
+        row = conn.execute("SELECT value, expires FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, expires = row
+        with conn:
+            if expires is not None and expires < now:
+                conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE cache SET used = ? WHERE key = ?", (now, key))
+        return pickle.loads(value)
+
+    def set(self, key, value, ttl=None):
+        conn = self.connect()
+        now = time.time()
+        expires = now + ttl if ttl else None
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires, used) VALUES (?, ?, ?, ?)",
+                (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), expires, now))
+            conn.execute(
+                "DELETE FROM cache WHERE key IN (SELECT key FROM cache ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,))
+
+    def delete(self, key):
+        conn = self.connect()
+        with conn:
+            conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+class LocalRedis:
+    """
+    Minimal in-process stand-in for the subset of the redis-py client that
+    RedisBackend uses (get, set with ex=, delete). Values must be bytes.
+    """
+
+    def __init__(self, max_entries=DEFAULT_SIZE):
+        self.store = MemoryBackend(max_entries)
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def set(self, key, value, ex=None):
+        self.store.set(key, bytes(value), ex)
+        return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self.store.delete(key)
+        return len(keys)
+
+class RedisBackend:
+    """
+    Stores pickled values in anything with the redis-py get/set/delete
+    interface. Size is bounded by the server's maxmemory-policy (use
+    allkeys-lru); entries expire through Redis TTLs.
+    """
+
+    def __init__(self, client, prefix='vedic:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            return None
+        return pickle.loads(value)
+
+    def set(self, key, value, ttl=None):
+        # Redis expiries are whole seconds
+        ex = max(1, int(math.ceil(ttl))) if ttl else None
+        self.client.set(self.prefix + key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ex=ex)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+def make_backend(url=None, max_entries=DEFAULT_SIZE):
+    """
+    Creates a backend from a VEDIC_CHART_CACHE style URL.
+    """
+    url = url or os.environ.get('VEDIC_CHART_CACHE', 'memory')
+    if url == 'memory':
+        return MemoryBackend(max_entries)
+    if url.startswith('sqlite:///'):
+        return SQLiteBackend(url[len('sqlite:///'):], max_entries)
+    if url == 'local-redis':
+        return RedisBackend(LocalRedis(max_entries))
+    if url.startswith('redis://'):
+        import redis # Optional dependency, only needed for a real server
+        return RedisBackend(redis.Redis.from_url(url))
+    raise ValueError(f"Unknown chart cache backend: {url}")
+
+def normalize_birth(dob, tob, lat, lon, tz):
+    """
+    Canonical form of the birth data, so '1990-12-8'/'22:35' and
+    '1990-12-08'/'22:35' with equal coordinates share one entry.
+    """
+    local_dt = datetime.datetime.strptime(f"{dob} {tob}", "%Y-%m-%d %H:%M")
+    return (
+        local_dt.strftime("%Y-%m-%d"),
+        local_dt.strftime("%H:%M"),
+        round(float(lat), 4),
+        round(float(lon), 4),
+        # Zone offsets before standard time are local mean time, e.g. +5:53:28
+        round(float(tz), 4),
+    )
+
+def chart_key(dob, tob, lat, lon, tz):
+    # Content address of the normalized birth data
+    normalized = normalize_birth(dob, tob, lat, lon, tz)
+    return 'chart:' + hashlib.sha1(repr(normalized).encode()).hexdigest()
+
+def make_chart_id(normalized, secret):
+    # Opaque handle for normalized birth data: a keyed hash, so it neither
+    # carries nor can be brute-forced back to the birth date and place
+    digest = hmac.new(secret, repr(normalized).encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:18]).decode()
+
+class ChartCache:
+    """
+    Read-through chart cache with hit/miss counters.
+    `compute` is called as compute(name, dob, tob, lat, lon, tz) on a miss.
+
+    Charts are shared between requests and stored without a name (pass it
+    to Chart.to_dict). Callers must not modify them; views built on a
+    chart from the memory backend stay with the cached entry, while the
+    sqlite and redis backends return a fresh unpickled copy per get.
+
+    chart_id handles are opaque: the birth data they stand for is stored
+    in the same backend for id_ttl. A handle that was evicted, or came
+    from another worker's memory backend, is unknown (ValueError) and the
+    client has to send the birth params again.
+    """
+
+    def __init__(self, compute, backend=None, ttl=DEFAULT_TTL,
+                 id_ttl=CHART_ID_TTL, secret=CHART_ID_SECRET):
+        self.compute = compute
+        self.backend = backend if backend is not None else make_backend()
+        self.ttl = ttl
+        self.id_ttl = id_ttl
+        self.secret = secret
+        self.hits = 0
+        self.misses = 0
+
+    def get_chart(self, dob, tob, lat, lon, tz):
+        key = chart_key(dob, tob, lat, lon, tz)
+        chart = self.backend.get(key)
+        if chart is None:
+            self.misses += 1
+            dob, tob, lat, lon, tz = normalize_birth(dob, tob, lat, lon, tz)
+            chart = self.compute(None, dob, tob, lat, lon, tz)
+            self.backend.set(key, chart, self.ttl)
+        else:
+            self.hits += 1
+        return chart
+
+    def chart_id(self, dob, tob, lat, lon, tz):
+        normalized = normalize_birth(dob, tob, lat, lon, tz)
+        chart_id = make_chart_id(normalized, self.secret)
+        self.backend.set('chart_id:' + chart_id, normalized, self.id_ttl)
+        return chart_id
+
+    def birth_of(self, chart_id):
+        # Normalized birth data behind a chart_id
+        normalized = self.backend.get('chart_id:' + chart_id) if isinstance(chart_id, str) else None
+        if normalized is None:
+            raise ValueError("Unknown or expired chart_id")
+        return normalized
+
+    def get_chart_by_id(self, chart_id):
+        return self.get_chart(*self.birth_of(chart_id))
+
+    def resolve_ids(self, records):
+        # Batch records with a known chart_id replaced by its birth data,
+        # so pool workers need no access to this cache. Unknown ones are
+        # passed on for analyze_births to report.
+        for record in records:
+            if isinstance(record, dict) and record.get('chart_id'):
+                try:
+                    dob, tob, lat, lon, tz = self.birth_of(record['chart_id'])
+                except ValueError:
+                    pass
+                else:
+                    record = {k: v for k, v in record.items() if k not in ('chart_id', 'zone')}
+                    record.update(dob=dob, tob=tob, lat=lat, lon=lon, tz=tz)
+            yield record
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+def rank_matches(matches, key):
+    """
+    Matches whose keys start with `key`, ordered like Gazetteer.matches:
+    exact matches first, then by population.
+    """
+    kept = [m for m in matches if any(k.startswith(key) for k in m[0])]
+    kept.sort(key=lambda m: (key not in m[0], -m[1]))
+    return kept
+
+def flight_error(error):
+    # What waiters on a failed flight get. A leader that was cancelled or
+    # interrupted (CancelledError, KeyboardInterrupt) must still release
+    # them, with an ordinary error rather than its own cancellation.
+    if isinstance(error, Exception):
+        return error
+    return RuntimeError(f"Place lookup interrupted: {type(error).__name__}")
+
+class SuggestionCache:
+    """
+    Prefix cache in front of a place lookup, for /suggest_place.
+    `lookup(key, query, limit)` is called with the normalized, encoded
+    query and the query as typed, and returns (matches, complete) as
+    Gazetteer.matches does; matches without keys (e.g. from Nominatim)
+    must come with complete=False.
+
+    - Entries are keyed on the normalized query, with LRU eviction and TTL.
+    - A complete result for "pat" answers "patn", "patna"... by filtering,
+      so typing a name costs one upstream lookup, not one per keystroke.
+      A filter that leaves nothing goes upstream instead, since the
+      lookup may have a fallback (Nominatim) for names the prefix lacked.
+    - Concurrent misses for the same key wait on a single upstream call.
+    """
+
+    def __init__(self, lookup, normalize, backend=None, ttl=SUGGEST_TTL, limit=20):
+        self.lookup = lookup
+        self.normalize = normalize
+        self.backend = backend if backend is not None else MemoryBackend(SUGGEST_SIZE)
+        self.ttl = ttl
+        self.limit = limit
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.filtered = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def entry_key(self, key):
+        return 'suggest:' + key.hex()
+
+    def cached(self, key):
+        entry = self.backend.get(self.entry_key(key))
+        if entry is not None:
+            self.hits += 1
+            return entry
+
+        # Longest shorter prefix with a complete result set
+        for n in range(len(key) - 1, 0, -1):
+            entry = self.backend.get(self.entry_key(key[:n]))
+            if entry is not None and entry[1]:
+                matches = rank_matches(entry[0], key)
+                if not matches:
+                    return None
+                self.filtered += 1
+                entry = (matches, True)
+                self.backend.set(self.entry_key(key), entry, self.ttl)
+                return entry
+        return None
+
+    def join_flight(self, key):
+        # (future, leader): the leader runs the lookup, the rest wait on it
+        with self.lock:
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self.in_flight[key] = concurrent.futures.Future()
+            self.misses += 1
+            return future, True
+
+    def finish_flight(self, key, future, entry=None, error=None):
+        # Waiters are released before the entry is stored, so a failing
+        # backend cannot leave them blocked
+        try:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(entry)
+                self.backend.set(self.entry_key(key), entry, self.ttl)
+        finally:
+            with self.lock:
+                self.in_flight.pop(key, None)
+
+    def places(self, entry):
+        return [place for _, _, place in entry[0][:self.limit]]
+
+    def suggest(self, query):
+        key = self.normalize(query)
+        if not key:
+            return []
+
+        entry = self.cached(key)
+        if entry is None:
+            future, leader = self.join_flight(key)
+            if leader:
+                try:
+                    entry = self.lookup(key, query, self.limit)
+                except BaseException as e:
+                    self.finish_flight(key, future, error=flight_error(e))
+                    raise
+                self.finish_flight(key, future, entry)
+            entry = future.result()
+        return self.places(entry)
+
+    async def suggest_async(self, query, lookup):
+        """
+        suggest() for the ASGI app: `lookup` is a coroutine function with
+        the same signature as self.lookup. Waiters do not block the loop.
+        """
+        key = self.normalize(query)
+        if not key:
+            return []
+
+        entry = self.cached(key)
+        if entry is None:
+            future, leader = self.join_flight(key)
+            if leader:
+                try:
+                    entry = await lookup(key, query, self.limit)
+                except BaseException as e:
+                    self.finish_flight(key, future, error=flight_error(e))
+                    raise
+                self.finish_flight(key, future, entry)
+            entry = await asyncio.wrap_future(future)
+        return self.places(entry)
+
+    def stats(self):
+        total = self.hits + self.filtered + self.misses + self.coalesced
+        return {
+            'hits': self.hits,
+            'filtered': self.filtered,
+            'misses': self.misses,
+            'coalesced': self.coalesced,
+            'hit_rate': round((total - self.misses) / total, 4) if total else 0.0,
+        }
@@ -1,21 +1,24 @@
 import datetime
+import functools
+import re
+import unicodedata
 
 # Keyword Mappings
 TOPICS = {
-    "self": {"house": 1, "karaka": ["Sun"], "keywords": ["self", "personality", "appearance", "body", "health", "character", "ego", "identity"]},
-    "wealth": {"house": 2, "karaka": ["Jupiter", "Venus"], "keywords": ["money", "wealth", "finance", "rich", "bank", "gain", "family", "speech"]},
+    "self": {"house": 1, "karaka": ["Sun"], "keywords": ["self", "personality", "appearance", "body", "health", "character", "ego", "identity", "myself"]},
+    "wealth": {"house": 2, "karaka": ["Jupiter", "Venus"], "keywords": ["money", "wealth", "finance", "rich", "bank", "gain", "family", "speech", "धन", "पैसा", "dhan", "paisa"]},
     "siblings": {"house": 3, "karaka": ["Mars", "Mercury"], "keywords": ["sibling", "brother", "sister", "courage", "communication", "skill", "talent", "writing"]},
-    "home": {"house": 4, "karaka": ["Moon", "Mars"], "keywords": ["home", "house", "property", "land", "mother", "residence", "car", "vehicle", "peace"]},
-    "children": {"house": 5, "karaka": ["Jupiter"], "keywords": ["child", "children", "baby", "son", "daughter", "progeny", "kids", "pregnant", "creativity", "intelligence"]},
-    "health": {"house": 6, "karaka": ["Saturn", "Mars", "Sun"], "keywords": ["health", "disease", "sick", "pain", "hospital", "illness", "sickness", "debt"]},
-    "job": {"house": 6, "karaka": ["Saturn", "Sun"], "keywords": ["job", "service", "employment", "employee", "workplace", "colleague", "subordinate"]}, # Separated from Health
-    "marriage": {"house": 7, "karaka": ["Venus", "Jupiter"], "keywords": ["marriage", "spouse", "wife", "husband", "partner", "love", "relationship", "marry", "married", "wedding", "partnership", "business partner"]},
+    "home": {"house": 4, "karaka": ["Moon", "Mars"], "keywords": ["home", "house", "property", "land", "mother", "residence", "car", "vehicle", "peace", "घर", "ghar"]},
+    "children": {"house": 5, "karaka": ["Jupiter"], "keywords": ["child", "children", "baby", "son", "daughter", "progeny", "kids", "pregnant", "creativity", "intelligence", "pregnancy", "संतान", "बच्चे", "santan"]},
+    "health": {"house": 6, "karaka": ["Saturn", "Mars", "Sun"], "keywords": ["health", "disease", "sick", "pain", "hospital", "illness", "sickness", "debt", "स्वास्थ्य", "सेहत", "बीमारी", "swasthya", "sehat"]},
+    "job": {"house": 6, "karaka": ["Saturn", "Sun"], "keywords": ["job", "service", "employment", "employee", "workplace", "colleague", "subordinate", "नौकरी", "naukri"]}, # Separated from Health
+    "marriage": {"house": 7, "karaka": ["Venus", "Jupiter"], "keywords": ["marriage", "spouse", "wife", "husband", "partner", "love", "relationship", "marry", "married", "wedding", "partnership", "business partner", "marrying", "loving", "loved", "शादी", "विवाह", "shaadi", "shadi", "vivah"]},
     "transformation": {"house": 8, "karaka": ["Saturn"], "keywords": ["death", "longevity", "occult", "mystery", "secret", "sudden", "inheritance", "transformation", "research"]},
-    "luck": {"house": 9, "karaka": ["Jupiter", "Sun"], "keywords": ["luck", "fortune", "dharma", "spiritual", "guru", "father", "travel", "pilgrimage", "higher education", "university"]},
-    "education": {"house": 9, "karaka": ["Mercury", "Jupiter"], "keywords": ["education", "study", "studies", "learning", "degree", "school", "college", "knowledge", "exam"]}, # 9th House primary for Higher Ed
-    "career": {"house": 10, "karaka": ["Saturn", "Sun"], "keywords": ["career", "job", "work", "business", "profession", "promotion", "status", "reputation", "fame", "authority"]},
-    "gains": {"house": 11, "karaka": ["Jupiter"], "keywords": ["gain", "income", "profit", "friend", "network", "wish", "desire", "award", "prize"]},
-    "loss": {"house": 12, "karaka": ["Saturn", "Ketu"], "keywords": ["loss", "expense", "foreign", "abroad", "sleep", "spiritual", "moksha", "isolation", "prison", "hospitalization"]}
+    "luck": {"house": 9, "karaka": ["Jupiter", "Sun"], "keywords": ["luck", "fortune", "dharma", "spiritual", "guru", "father", "travel", "pilgrimage", "higher education", "university", "spirituality", "travelling", "traveling", "travelled", "traveled", "भाग्य", "bhagya"]},
+    "education": {"house": 9, "karaka": ["Mercury", "Jupiter"], "keywords": ["education", "study", "studies", "learning", "degree", "school", "college", "knowledge", "exam", "studying", "studied", "शिक्षा", "पढ़ाई", "padhai", "shiksha"]}, # 9th House primary for Higher Ed
+    "career": {"house": 10, "karaka": ["Saturn", "Sun"], "keywords": ["career", "job", "work", "business", "profession", "promotion", "status", "reputation", "fame", "authority", "working", "worked", "करियर", "व्यापार", "vyapar"]},
+    "gains": {"house": 11, "karaka": ["Jupiter"], "keywords": ["gain", "income", "profit", "friend", "network", "wish", "desire", "award", "prize", "gaining", "gained"]},
+    "loss": {"house": 12, "karaka": ["Saturn", "Ketu"], "keywords": ["loss", "expense", "foreign", "abroad", "sleep", "spiritual", "moksha", "isolation", "prison", "hospitalization", "spirituality", "विदेश", "videsh"]}
 }
 
 HOUSE_MEANINGS = {
@@ -40,169 +43,227 @@ HOUSE_LORDS = {
 }
 
 from transit_utils import get_current_transits, analyze_transits
+from astrology_utils import SIGNS
 
-def get_house_of_planet(d1_chart, planet):
-    for h, planets in d1_chart.items():
-        if planet in planets:
-            return h
-    return "?"
+def get_sign_of_house(house_num, asc_idx):
+    # asc_idx is the Lagna sign index (0 = Aries)
+    return SIGNS[(asc_idx + house_num - 1) % 12]
 
-def get_sign_of_house(house_num, ascendant_sign):
-    signs_list = ['Aries', 'Taurus', 'Gemini', 'Cancer', 'Leo', 'Virgo', 
-                  'Libra', 'Scorpio', 'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces']
-    asc_idx = signs_list.index(ascendant_sign)
-    target_sign_idx = (asc_idx + house_num - 1) % 12
-    return signs_list[target_sign_idx]
+# Characters that continue a word: \w plus the Devanagari block, whose
+# vowel signs, nukta and virama are not \w
+WORD_CHAR = r'[\w\u0900-\u097F]'
+
+def normalize(text):
+    return unicodedata.normalize('NFC', text).lower()
+
+def plurals(kw):
+    # A keyword and its English plural; 'es' only follows s/x/z/ch/sh, so
+    # 'car' does not pick up 'cares'
+    if not kw.isascii() or not kw[-1].isalpha():
+        return [kw]
+    if kw.endswith(('s', 'x', 'z', 'ch', 'sh')):
+        return [kw, kw + 'es']
+    if kw.endswith('y') and kw[-2:-1] not in ('a', 'e', 'i', 'o', 'u'):
+        return [kw, kw[:-1] + 'ies']
+    return [kw, kw + 's']
+
+def trie_pattern(node):
+    # Regex for the words of a character trie; common prefixes are shared,
+    # so matching does not retry every keyword at every position
+    branches = [re.escape(ch) + trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    # Longer words are tried first, so 'business partner' beats 'business'
+    return f'(?:{body})?' if '' in node else body
+
+class TopicMatcher:
+    """
+    Finds every keyword of a topic table in one pass over a question and
+    ranks the topics they point to. Verb forms (working, studied) are
+    listed as keywords; plurals are added here.
+    """
+
+    def __init__(self, topics, generic=()):
+        self.order = {topic: i for i, topic in enumerate(topics)}
+        self.generic = set(generic)
+        # Surface form -> topics listing it (or its singular)
+        self.owners = {}
+        for topic, data in topics.items():
+            for kw in data['keywords']:
+                for form in plurals(normalize(kw)):
+                    owners = self.owners.setdefault(form, [])
+                    if topic not in owners:
+                        owners.append(topic)
+
+        trie = {}
+        for form in self.owners:
+            node = trie
+            for ch in form:
+                node = node.setdefault(ch, {})
+            node[''] = {}
+        # Whole words only, so 'car' no longer matches 'career'
+        self.pattern = re.compile(rf'(?<!{WORD_CHAR})({trie_pattern(trie)})(?!{WORD_CHAR})')
+
+    def rank(self, question):
+        """
+        [(topic, score), ...] best first. A keyword shared by n topics adds
+        1/n to each. On equal scores a specific topic beats a generic one,
+        then the topic mentioned first wins, then TOPICS order.
+        """
+        scores = {}
+        first = {}
+        for match in self.pattern.finditer(normalize(question)):
+            owners = self.owners[match.group(1)]
+            for topic in owners:
+                scores[topic] = scores.get(topic, 0.0) + 1.0 / len(owners)
+                first.setdefault(topic, match.start())
+        ranked = sorted(scores, key=lambda t: (-scores[t], t in self.generic, first[t], self.order[t]))
+        return [(topic, scores[topic]) for topic in ranked]
+
+# 'self' shares keywords such as 'health' with more specific topics
+TOPIC_MATCHER = TopicMatcher(TOPICS, generic=("self",))
+
+def rank_topics(question):
+    return TOPIC_MATCHER.rank(question)
+
+# Houses read for a topic, in priority order; the rest use their own house
+TOPIC_HOUSES = {
+    "education": (9, 5, 4), # 9th primary for higher learning
+}
+
+def topic_houses(topic):
+    return TOPIC_HOUSES.get(topic, (TOPICS[topic]['house'],))
+
+def house_lord(house_num, asc_idx):
+    return HOUSE_LORDS[get_sign_of_house(house_num, asc_idx)]
+
+# Answer templates. The chart part of an answer (houses, lords, karakas)
+# depends only on the topic, the Lagna and the houses the lords and karakas
+# occupy, so it is rendered once per combination and cached; the dasha and
+# transit parts depend on today and are filled in per question.
+UNKNOWN_ANSWER = "I can generally answer questions about any aspect of life (Career, Wealth, Marriage, Health, Spirituality, etc.). Try asking something specific like 'How is my luck?' or 'Will I go abroad?'."
+ASPECT_TEMPLATE = "**Aspect:** {topic}\n"
+HOUSE_TEMPLATE = "\n**{house}th House ({meaning}):**\n- **House Lord:** {lord} (Placed in {sign}, House {placed})\n"
+DUSTHANA_TEMPLATE = "  - *Observation:* The lord is in a challenging house ({placed}), suggesting potential hurdles or hard work needed here.\n"
+KENDRA_TRIKONA_NOTE = "  - *Observation:* The lord is well-placed in a Kendra/Trikona, indicating strength.\n"
+KARAKA_HEADER = "\n**Karaka (Significators) Analysis:**\n"
+KARAKA_TEMPLATE = "- **{planet}:** Placed in {sign} (House {house})\n"
+TRANSIT_TEMPLATE = "\n**🌍 Current Planetary Transits (Gochar):**\n{transits}\n"
+TIMING_TEMPLATE = "\n**Timing:**\nYou are {period}\n"
+ACTIVE_NOTE = "Since a relevant planet is active, expect significant developments in this area.\n"
+FAVORABLE_TRANSITS = "However, **Current Transits are Favorable**, indicating a good time to act despite the neutral Dasha."
+CHALLENGING_TRANSITS = "Current Transits also suggest some challenges, so patience is advised."
+
+DUSTHANAS = (6, 8, 12)
+KENDRA_TRIKONAS = (1, 4, 7, 10, 5, 9)
+
+@functools.lru_cache(maxsize=2048)
+def house_fragment(house_num, asc_idx, placed):
+    # One house: its lord and where the lord sits
+    parts = [HOUSE_TEMPLATE.format(house=house_num, meaning=HOUSE_MEANINGS[house_num],
+                                   lord=house_lord(house_num, asc_idx),
+                                   sign=get_sign_of_house(placed, asc_idx), placed=placed)]
+    if placed in DUSTHANAS:
+        parts.append(DUSTHANA_TEMPLATE.format(placed=placed))
+    elif placed in KENDRA_TRIKONAS:
+        parts.append(KENDRA_TRIKONA_NOTE)
+    return ''.join(parts)
+
+@functools.lru_cache(maxsize=4096)
+def chart_fragment(topic, asc_idx, lord_houses, karaka_houses):
+    """
+    The chart part of an answer for a topic, given the houses of the topic's
+    house lords and karakas. Cached per (topic, Lagna, placements).
+    """
+    parts = [ASPECT_TEMPLATE.format(topic=topic.capitalize())]
+    parts.extend(house_fragment(h, asc_idx, placed) for h, placed in zip(topic_houses(topic), lord_houses))
+    parts.append(KARAKA_HEADER)
+    for planet, house in zip(TOPICS[topic]['karaka'], karaka_houses):
+        if house is not None:
+            parts.append(KARAKA_TEMPLATE.format(planet=planet, sign=get_sign_of_house(house, asc_idx), house=house))
+    return ''.join(parts)
+
+def fragment_stats():
+    info = chart_fragment.cache_info()
+    total = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'size': info.currsize,
+        'hit_rate': round(info.hits / total, 4) if total else 0.0,
+    }
+
+def dasha_period(dasha, planets, now):
+    """
+    (text, is_running): the running Mahadasha/Antardasha of one of `planets`,
+    or else the nearest upcoming one.
+    """
+    if not dasha:
+        return "No immediate major activation found in Dasha.", False
+
+    md = dasha.index(1).at(now)
+    ad = dasha.index(2).at(now)
+    if md and ad and ad.lord in planets:
+        return f"currently in the **Antardasha of {ad.lord}** (under {md.lord} MD) until {ad.end_date}.", True
+    if md and md.lord in planets:
+        return f"currently in the **Mahadasha of {md.lord}** (until {md.end_date}).", True
+
+    next_md = dasha.index(1).next_for_lords(planets, now)
+    next_ad = dasha.index(2).next_for_lords(planets, now)
+    # A Mahadasha starts together with its own first Antardasha, so on a
+    # tie the Mahadasha is reported
+    if next_md and (not next_ad or next_md.start <= next_ad.start):
+        return f"upcoming **Mahadasha of {next_md.lord}** starting on {next_md.start_date}.", False
+    if next_ad:
+        return f"upcoming **Antardasha of {next_ad.lord}** (in {next_ad.path[0]} MD) starting on {next_ad.start_date}.", False
+    return "No immediate major activation found in Dasha.", False
 
 def process_question(question, chart_data):
     # 1. Identify Topic
-    q_lower = question.lower()
-    topic_data = None
-    detected_topic = "General"
-    
-    for key, data in TOPICS.items():
-        for kw in data['keywords']:
-            if kw in q_lower:
-                topic_data = data
-                detected_topic = key.capitalize()
-                break
-        if topic_data:
-            break
-            
-    if not topic_data:
-        return {
-            "answer": "I can generally answer questions about any aspect of life (Career, Wealth, Marriage, Health, Spirituality, etc.). Try asking something specific like 'How is my luck?' or 'Will I go abroad?'.",
-            "topic": "Unknown"
-        }
-
-    # 2. Logic Branching: Education (Multi-House) vs Others (Single House)
-    target_houses = []
-    if detected_topic == "Education":
-        target_houses = [9, 5, 4] # Priority Order
-    else:
-        target_houses = [topic_data['house']]
-
-    karakas = topic_data['karaka']
-    ascendant_sign = chart_data['details']['Ascendant']
-    p_details = {p['Planet']: p for p in chart_data['planetary_details']}
-    
-    response = f"**Aspect:** {detected_topic}\n"
-    
-    all_relevant_planets_for_transit = []
-    all_relevant_planets_for_transit.extend(karakas)
-
-    # 3. Analyze Each House Logic
-    for h_num in target_houses:
-        sign = get_sign_of_house(h_num, ascendant_sign)
-        lord = HOUSE_LORDS[sign]
-        lord_info = p_details.get(lord)
-        
-        all_relevant_planets_for_transit.append(lord)
-        
-        lord_placed_house = get_house_of_planet(chart_data['d1'], lord)
-        lord_placed_sign = lord_info['Sign'] if lord_info else "?"
-
-        # Append to response
-        response += f"\n**{h_num}th House ({HOUSE_MEANINGS[h_num]}):**\n"
-        response += f"- **House Lord:** {lord} (Placed in {lord_placed_sign}, House {lord_placed_house})\n"
-        
-        # Simple synthesis
-        if str(lord_placed_house) in ['6', '8', '12']:
-            response += f"  - *Observation:* The lord is in a challenging house ({lord_placed_house}), suggesting potential hurdles or hard work needed here.\n"
-        elif str(lord_placed_house) in ['1', '4', '7', '10', '5', '9']:
-            response += f"  - *Observation:* The lord is well-placed in a Kendra/Trikona, indicating strength.\n"
-
-    # Add Karakas info once
-    response += "\n**Karaka (Significators) Analysis:**\n"
-    for k in karakas:
-        k_info = p_details.get(k)
-        if k_info:
-            h = get_house_of_planet(chart_data['d1'], k)
-            response += f"- **{k}:** Placed in {k_info['Sign']} (House {h})\n"
-
-    # 4. Dasha Analysis (Check against ALL relevant planets)
-    vimshottari = chart_data.get('vimshottari', [])
-    current_date = datetime.datetime.now().strftime("%Y-%m-%d")
-    unique_planets = list(set(all_relevant_planets_for_transit)) # Dedup
-
-    upcoming_period = None
-    is_running = False
-
-    # Check currently running dasha
-    for d in vimshottari:
-        start = d['Start']
-        end = d['End']
-        if start <= current_date <= end:
-            if d['Lord'] in unique_planets:
-                upcoming_period = f"currently in the **Mahadasha of {d['Lord']}** (until {end})."
-                is_running = True
-            
-            if 'Antardashas' in d:
-                for ad in d['Antardashas']:
-                    if ad['Start'] <= current_date <= ad['End']:
-                        if ad['Lord'] in unique_planets:
-                            upcoming_period = f"currently in the **Antardasha of {ad['Lord']}** (under {d['Lord']} MD) until {ad['End']}."
-                            is_running = True
-                            break
-            break
-
-    # If not currently running relevant period, find the NEAREST upcoming one (AD or MD)
-    if not is_running:
-        nearest_date = None
-        nearest_msg = ""
-        
-        # We need to iterate through the entire structured list. 
-        # Assuming 'vimshottari' is sorted by date.
-        for d in vimshottari:
-            # Check MD Start
-            if d['Start'] > current_date:
-                if d['Lord'] in unique_planets:
-                    # Found a future MD
-                    nearest_msg = f"upcoming **Mahadasha of {d['Lord']}** starting on {d['Start']}."
-                    break # Stop at first major future event
-            
-            # Check ADs
-            if 'Antardashas' in d:
-                for ad in d['Antardashas']:
-                     if ad['Start'] > current_date:
-                         if ad['Lord'] in unique_planets:
-                             # We found a relevant sub-period
-                             nearest_msg = f"upcoming **Antardasha of {ad['Lord']}** (in {d['Lord']} MD) starting on {ad['Start']}."
-                             break
-                if nearest_msg: break
-        
-        if nearest_msg:
-             upcoming_period = nearest_msg
-        else:
-             upcoming_period = "No immediate major activation found in Dasha."
-
-    # 5. Connect with Transits (Gochar) of ALL relevant planets
+    ranked = rank_topics(question)
+    if not ranked:
+        return {"answer": UNKNOWN_ANSWER, "topic": "Unknown"}
+    topic = ranked[0][0]
+    karakas = TOPICS[topic]['karaka']
+    asc_idx = chart_data.asc_sign
+
+    # 2. Houses, lords and karakas: pre-rendered per chart placement
+    lords = [house_lord(h, asc_idx) for h in topic_houses(topic)]
+    parts = [chart_fragment(topic, asc_idx,
+                            tuple(chart_data.house_of(lord) for lord in lords),
+                            tuple(chart_data.house_of(k) for k in karakas))]
+
+    # 3. Dasha Analysis (Check against ALL relevant planets)
+    unique_planets = list(set(karakas + lords)) # Dedup
+    upcoming_period, is_running = dasha_period(chart_data.dasha, unique_planets, datetime.datetime.now())
+
+    # 4. Connect with Transits (Gochar) of ALL relevant planets
     transit_insight = ""
     try:
         current_transits = get_current_transits()
-        moon_sign = chart_data['details'].get('Moon Sign', 'Aries') 
+        moon_sign = SIGNS[chart_data.moon_sign]
         transit_msg = analyze_transits(moon_sign, current_transits, unique_planets)
-        
+
         if transit_msg:
             # Check for positive keywords in the transit analysis to construct a summary
-            if "favorable" in transit_msg.lower() or "auspicious" in transit_msg.lower() or "supportive" in transit_msg.lower():
-                transit_insight = "However, **Current Transits are Favorable**, indicating a good time to act despite the neutral Dasha."
-            elif "challenging" in transit_msg.lower():
-                transit_insight = "Current Transits also suggest some challenges, so patience is advised."
-            
-            response += f"\n**🌍 Current Planetary Transits (Gochar):**\n"
-            response += f"{transit_msg}\n"
-            
+            lowered = transit_msg.lower()
+            if "favorable" in lowered or "auspicious" in lowered or "supportive" in lowered:
+                transit_insight = FAVORABLE_TRANSITS
+            elif "challenging" in lowered:
+                transit_insight = CHALLENGING_TRANSITS
+            parts.append(TRANSIT_TEMPLATE.format(transits=transit_msg))
+
     except Exception as e:
         print(f"Transit Error: {e}")
 
-    response += f"\n**Timing:**\nYou are {upcoming_period}\n"
+    parts.append(TIMING_TEMPLATE.format(period=upcoming_period))
     if is_running:
-        response += "Since a relevant planet is active, expect significant developments in this area.\n"
+        parts.append(ACTIVE_NOTE)
     elif transit_insight:
-        response += f"{transit_insight}\n"
+        parts.append(transit_insight + "\n")
 
     return {
-        "answer": response,
-        "topic": detected_topic
+        "answer": ''.join(parts),
+        "topic": topic.capitalize()
     }
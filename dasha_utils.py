@@ -0,0 +1,272 @@
+import bisect
+import datetime
+import math
+
+# Vimshottari Dasha
+# Sequence: Ketu, Venus, Sun, Moon, Mars, Rahu, Jupiter, Saturn, Mercury
+DASHA_LORDS = ["Ketu", "Venus", "Sun", "Moon", "Mars", "Rahu", "Jupiter", "Saturn", "Mercury"]
+DASHA_YEARS = {
+    "Ketu": 7, "Venus": 20, "Sun": 6, "Moon": 10, "Mars": 7,
+    "Rahu": 18, "Jupiter": 16, "Saturn": 19, "Mercury": 17
+}
+TOTAL_YEARS = 120
+YEAR_DAYS = 365.25
+
+# Depth of a period in the tree. Levels below Antardasha are never stored;
+# they are generated for the date window that is asked for.
+LEVEL_NAMES = {
+    1: "Mahadasha", 2: "Antardasha", 3: "Pratyantar",
+    4: "Sookshma", 5: "Prana", 6: "Deha"
+}
+MAX_DEPTH = len(LEVEL_NAMES)
+
+# Boundaries are kept as day numbers: proleptic Gregorian ordinal plus the
+# fraction of the day, so dasha arithmetic is plain float addition and dates
+# are only formatted when serialized.
+
+def to_day_number(when):
+    if isinstance(when, datetime.datetime):
+        seconds = when.hour * 3600 + when.minute * 60 + when.second + when.microsecond / 1e6
+        return when.toordinal() + seconds / 86400.0
+    if isinstance(when, datetime.date):
+        return float(when.toordinal())
+    return float(when)
+
+def to_date(day_number):
+    return datetime.date.fromordinal(int(math.floor(day_number)))
+
+def format_day(day_number):
+    return to_date(day_number).strftime("%Y-%m-%d")
+
+class DashaPeriod:
+    """
+    One period of the timeline. `start`/`end` are day numbers of the full
+    theoretical period; `shown_start` is clipped to the birth date.
+    `path` holds the lords from Mahadasha down to this period.
+    """
+    __slots__ = ('path', 'start', 'end', 'years', 'shown_start')
+
+    def __init__(self, path, start, end, years, shown_start):
+        self.path = path
+        self.start = start
+        self.end = end
+        self.years = years
+        self.shown_start = shown_start
+
+    @property
+    def lord(self):
+        return self.path[-1]
+
+    @property
+    def level(self):
+        return len(self.path)
+
+    @property
+    def start_date(self):
+        return format_day(self.shown_start)
+
+    @property
+    def end_date(self):
+        return format_day(self.end)
+
+    def contains(self, day):
+        return self.shown_start <= day < self.end
+
+    def to_dict(self):
+        return {
+            "Level": LEVEL_NAMES[self.level],
+            "Lord": self.lord,
+            "Path": "/".join(self.path),
+            "Start": self.start_date,
+            "End": self.end_date,
+        }
+
+    def __repr__(self):
+        return f"DashaPeriod({'/'.join(self.path)}, {self.start_date} to {self.end_date})"
+
+class DashaIndex:
+    """
+    All periods of one level of a timeline, flattened in chronological order
+    with sorted start arrays, so lookups are bisect searches:
+    - at(date): the period running at a date
+    - next_for_lords(lords, date): first later period ruled by any of lords
+    """
+
+    def __init__(self, periods):
+        self.periods = periods
+        self.starts = [p.start for p in periods]
+        self.ends = [p.end for p in periods]
+
+        # Per-lord start lists (sorted) and positions into self.periods
+        self.lord_starts = {}
+        self.lord_positions = {}
+        for i, p in enumerate(periods):
+            self.lord_starts.setdefault(p.lord, []).append(p.start)
+            self.lord_positions.setdefault(p.lord, []).append(i)
+
+    def at(self, when):
+        day = to_day_number(when)
+        i = bisect.bisect_right(self.starts, day) - 1
+        if i < 0 or not self.periods[i].contains(day):
+            return None
+        return self.periods[i]
+
+    def next_for_lords(self, lords, when):
+        day = to_day_number(when)
+        best = None
+        for lord in set(lords):
+            starts = self.lord_starts.get(lord)
+            if not starts:
+                continue
+            j = bisect.bisect_right(starts, day)
+            if j < len(starts) and (best is None or starts[j] < self.starts[best]):
+                best = self.lord_positions[lord][j]
+        return self.periods[best] if best is not None else None
+
+class DashaTimeline:
+    """
+    Lazy Vimshottari timeline covering one 120-year cycle from birth.
+    Only the nine Mahadasha boundaries are stored; sub-periods are derived
+    arithmetically when asked for.
+    """
+
+    def __init__(self, moon_lon, birth_date):
+        # 360 degrees / 27 nakshatras = 13.3333 degrees per nakshatra
+        one_star = 360.0 / 27.0
+        moon_nak_idx = int(moon_lon / one_star)
+        passed_percent = (moon_lon % one_star) / one_star # 0.0 to 1.0 (passed)
+
+        # Lord of Birth Nakshatra (pattern repeats every 9 nakshatras)
+        self.start_idx = moon_nak_idx % 9
+        start_lord = DASHA_LORDS[self.start_idx]
+
+        self.birth = to_day_number(birth_date)
+        self.balance_years = DASHA_YEARS[start_lord] * (1.0 - passed_percent)
+
+        # Theoretical start of the birth Mahadasha, before birth
+        theo_start = self.birth - DASHA_YEARS[start_lord] * passed_percent * YEAR_DAYS
+
+        self.indexes = {} # depth -> DashaIndex, built on first use
+
+        self.md_lords = [DASHA_LORDS[(self.start_idx + i) % 9] for i in range(9)]
+        self.md_bounds = [theo_start]
+        for lord in self.md_lords:
+            self.md_bounds.append(self.md_bounds[-1] + DASHA_YEARS[lord] * YEAR_DAYS)
+
+    @property
+    def end(self):
+        return self.md_bounds[-1]
+
+    def mahadashas(self):
+        for i, lord in enumerate(self.md_lords):
+            start = self.md_bounds[i]
+            yield DashaPeriod((lord,), start, self.md_bounds[i + 1], DASHA_YEARS[lord], max(start, self.birth))
+
+    def sub_periods(self, period):
+        """
+        The nine sub-periods of `period`, starting from its own lord.
+        """
+        lord_idx = DASHA_LORDS.index(period.lord)
+        cursor = period.start
+        for i in range(9):
+            sub_lord = DASHA_LORDS[(lord_idx + i) % 9]
+            years = period.years * DASHA_YEARS[sub_lord] / TOTAL_YEARS
+            # The last one ends exactly with its parent, not on a float sum
+            end = cursor + years * YEAR_DAYS if i < 8 else period.end
+            yield DashaPeriod(period.path + (sub_lord,), cursor, end, years, max(cursor, self.birth))
+            cursor = end
+
+    def period_at(self, when, depth=1):
+        """
+        List of periods (Mahadasha first, `depth` levels) running at `when`,
+        or None outside the timeline.
+        """
+        day = to_day_number(when)
+        if not self.birth <= day < self.end:
+            return None
+
+        i = bisect.bisect_right(self.md_bounds, day) - 1
+        lord = self.md_lords[i]
+        period = DashaPeriod((lord,), self.md_bounds[i], self.md_bounds[i + 1], DASHA_YEARS[lord],
+                             max(self.md_bounds[i], self.birth))
+        chain = [period]
+        while len(chain) < depth:
+            # First child ending after `day` (the last child if none does)
+            for sub in self.sub_periods(period):
+                if day < sub.end:
+                    break
+            period = sub
+            chain.append(period)
+        return chain
+
+    def periods_between(self, start, end, depth):
+        """
+        Periods at `depth` overlapping [start, end), in chronological order.
+        Only branches that overlap the window are expanded, so the cost
+        follows the number of periods in the window, not the full tree.
+        """
+        lo = max(to_day_number(start), self.birth)
+        hi = to_day_number(end)
+
+        def walk(period):
+            if period.end <= lo or period.start >= hi:
+                return
+            if period.level == depth:
+                yield period
+                return
+            for sub in self.sub_periods(period):
+                yield from walk(sub)
+
+        for md in self.mahadashas():
+            yield from walk(md)
+
+    def iter_periods(self, when=None, depth=1):
+        """
+        Periods at `depth` in chronological order, starting with the one
+        running at `when` (default: birth).
+        """
+        start = self.birth if when is None else when
+        return self.periods_between(start, self.end, depth)
+
+    def index(self, depth=1):
+        """
+        DashaIndex over every period at `depth` (9, 81, 729... entries),
+        built once and kept with the timeline.
+        """
+        if depth not in self.indexes:
+            self.indexes[depth] = DashaIndex(list(self.iter_periods(depth=depth)))
+        return self.indexes[depth]
+
+    def find_next(self, lords, when=None, depth=1):
+        """
+        First period at `depth` starting after `when` (default: birth) whose
+        lord is in `lords`, or None.
+        """
+        return self.index(depth).next_for_lords(lords, self.birth if when is None else when)
+
+    def to_list(self):
+        """
+        Full Mahadasha/Antardasha tree in the /get_chart JSON shape.
+        """
+        dashas = []
+        for i, md in enumerate(self.mahadashas()):
+            # The first Mahadasha is the balance running at birth
+            is_balance = i == 0
+            ads = []
+            for ad in self.sub_periods(md):
+                if ad.end <= self.birth:
+                    continue
+                ads.append({
+                    "Lord": ad.lord,
+                    "Start": ad.start_date,
+                    "End": ad.end_date,
+                    "Duration": "-" if is_balance else f"{ad.years:.2f}y"
+                })
+            dashas.append({
+                "Lord": md.lord,
+                "Start": md.start_date,
+                "End": md.end_date,
+                "Duration": f"{self.balance_years:.1f}y (Bal)" if is_balance else f"{md.years}y",
+                "Antardashas": ads
+            })
+        return dashas
@@ -1,4 +1,4 @@
-from astrology_utils import calculate_chart
+from astrology_utils import calculate_chart, SIGNS
 from astrology_utils import calculate_chart
 from analysis_utils import get_yogas, get_house_analysis, get_mahadasha_prediction, get_nakshatra_analysis, check_manglik, get_karmic_analysis
 import json
@@ -14,7 +14,7 @@ if __name__ == "__main__":
     print(f"Calculating for: {name}, {dob} {tob}, {lat}, {lon}")
     data = calculate_chart(name, dob, tob, lat, lon, tz)
     
-    print("Ascendant:", data['details']['Ascendant'])
+    print("Ascendant:", SIGNS[data.asc_sign])
     
     print("\n--- ANALYSIS REPORT ---")
     yogas = get_yogas(data)
@@ -22,13 +22,13 @@ if __name__ == "__main__":
     for y in yogas:
         print(f"- {y['name']}: {y['desc']}")
         
-    vim = data.get('vimshottari', [])
+    vim = data.dasha.to_list()
     if vim:
         print(f"\nMimshottari Dasha (Total {len(vim)} Rows):")
         for d in vim:
             print(f"MD: {d['Lord']} | {d['Start']} to {d['End']} | {d['Duration']}")
     print("\nDasha Prediction:")
-    dp = get_mahadasha_prediction(data['vimshottari'])
+    dp = get_mahadasha_prediction(data.dasha)
     print(f"Running: {dp['current_lord']} ({dp['period']})")
     print(dp['prediction'])
     
@@ -0,0 +1,279 @@
+import ephem
+import math
+import os
+import struct
+import sys
+import numpy as np
+
+# Precomputed ephemeris: tropical ecliptic longitudes (degrees) of the seven
+# visible bodies sampled on a fixed grid, interpolated on lookup.
+#
+# Build once with:  python ephemeris_utils.py [start_year end_year]
+# Dates outside the table (or a missing or stale table) fall back to live ephem.
+#
+# File layout (little endian), memory-mapped read-only so every gunicorn
+# worker shares the same page-cache pages:
+#   magic b'VEPH', format version (u32), start JD, end JD, max error (f64),
+#   body count (u32), then per body: step in days (f64), sample count (u64),
+#   zero padding to a 16 byte boundary, then the float32 samples of every
+#   body back to back in BODIES order.
+
+BODIES = {
+    'Sun': ephem.Sun,
+    'Moon': ephem.Moon,
+    'Mercury': ephem.Mercury,
+    'Venus': ephem.Venus,
+    'Mars': ephem.Mars,
+    'Jupiter': ephem.Jupiter,
+    'Saturn': ephem.Saturn,
+}
+
+# Sampling step in days. The Moon (~13 deg/day) and Mercury (sharp turns near
+# inferior conjunction) get finer grids to stay well inside MAX_ERROR.
+STEPS = {
+    'Sun': 1.0,
+    'Moon': 0.25,
+    'Mercury': 0.5,
+    'Venus': 1.0,
+    'Mars': 1.0,
+    'Jupiter': 1.0,
+    'Saturn': 1.0,
+}
+
+DEFAULT_PATH = os.environ.get(
+    'VEDIC_EPHEMERIS', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ephemeris.bin'))
+
+# Interpolation error allowed at build time (degrees, 1 arcsecond)
+MAX_ERROR = 1.0 / 3600.0
+
+# The header's max_error is the worst error measured at the build checks
+# times this factor. Every interval is checked at its midpoint, where the
+# cubic's error term peaks; the factor covers float32 rounding elsewhere in
+# the interval and the sub-arcsecond jumps of ephem's own series between
+# checks (up to ~1.9x the worst midpoint error in dense sampling).
+ERROR_MARGIN = 2.0
+
+MAGIC = b'VEPH'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sIdddI')
+BODY_HEADER = struct.Struct('<dQ')
+
+EPHEM_EPOCH_JD = 2415020.0 # ephem.Date counts days from 1899-12-31 12:00 UT
+
+def live_longitude(body, jd):
+    # Tropical ecliptic longitude (degrees) straight from ephem
+    body.compute(ephem.Date(jd - EPHEM_EPOCH_JD))
+    return ephem.Ecliptic(body).lon * 180.0 / math.pi
+
+def interpolate(samples, start, step, jd):
+    """
+    4-point Lagrange interpolation of wrapped longitudes sampled every `step`
+    days from `start`. `jd` is an array; every element must be covered.
+    """
+    x = (jd - start) / step
+    i = np.clip(np.floor(x).astype(np.int64), 1, len(samples) - 3)
+    u = x - i
+
+    p0, p1, p2, p3 = (samples[i + k].astype(np.float64) for k in (-1, 0, 1, 2))
+    # Unwrap the neighbours relative to p0 so a 360 -> 0 crossing stays smooth
+    d1 = (p1 - p0 + 180) % 360 - 180
+    d2 = d1 + (p2 - p1 + 180) % 360 - 180
+    d3 = d2 + (p3 - p2 + 180) % 360 - 180
+
+    # Nodes at u = -1, 0, 1, 2
+    w1 = (u + 1) * (u - 1) * (u - 2) / 2.0
+    w2 = -(u + 1) * u * (u - 2) / 2.0
+    w3 = (u + 1) * u * (u - 1) / 6.0
+    return (p0 + w1 * d1 + w2 * d2 + w3 * d3) % 360
+
+class StaleEphemerisError(Exception):
+    pass
+
+class EphemerisTable:
+    """
+    Read-only view over a memory-mapped ephemeris file.
+    """
+
+    def __init__(self, samples, start, end, steps, max_error):
+        self.samples = samples
+        self.start = start
+        self.end = end
+        self.steps = steps
+        self.max_error = max_error
+
+    def covers(self, jd):
+        # Interpolation needs one sample either side of the bracket
+        margin = max(self.steps.values()) * 2
+        return (jd >= self.start + margin) & (jd <= self.end - margin)
+
+    def longitudes(self, name, jd):
+        return interpolate(self.samples[name], self.start, self.steps[name], jd)
+
+    def longitude_at(self, name, jd):
+        # Scalar version of interpolate(); avoids NumPy overhead for one date
+        samples = self.samples[name]
+        x = (jd - self.start) / self.steps[name]
+        i = min(max(int(math.floor(x)), 1), len(samples) - 3)
+        u = x - i
+
+        p0, p1, p2, p3 = samples[i - 1:i + 3].tolist()
+        d1 = (p1 - p0 + 180) % 360 - 180
+        d2 = d1 + (p2 - p1 + 180) % 360 - 180
+        d3 = d2 + (p3 - p2 + 180) % 360 - 180
+
+        w1 = (u + 1) * (u - 1) * (u - 2) / 2.0
+        w2 = -(u + 1) * u * (u - 2) / 2.0
+        w3 = (u + 1) * u * (u - 1) / 6.0
+        return (p0 + w1 * d1 + w2 * d2 + w3 * d3) % 360
+
+def build_ephemeris(path=DEFAULT_PATH, start_year=1900, end_year=2100, check_every=1):
+    """
+    Samples every body over [start_year, end_year] and writes the table.
+    Every `check_every`-th interval (default all) is checked at its
+    midpoint against ephem; the build fails if any error exceeds MAX_ERROR.
+    The stored max_error is the worst one times ERROR_MARGIN, and is only
+    a bound when every interval was checked.
+    """
+    start = ephem.julian_date(ephem.Date(f"{start_year}/1/1"))
+    end = ephem.julian_date(ephem.Date(f"{end_year + 1}/1/1"))
+
+    arrays = {}
+    max_error = 0.0
+    for name, cls in BODIES.items():
+        body = cls()
+        step = STEPS[name]
+        count = int(math.ceil((end - start) / step)) + 1
+        samples = np.empty(count, dtype=np.float32)
+        for k in range(count):
+            samples[k] = live_longitude(body, start + k * step)
+        arrays[name] = samples
+
+        checks = start + (np.arange(1, count - 3, check_every) + 0.5) * step
+        expected = np.array([live_longitude(body, jd) for jd in checks])
+        got = interpolate(samples, start, step, checks)
+        err = float(np.max(np.abs((got - expected + 180) % 360 - 180)))
+        print(f"{name}: {count} samples, max error {err * 3600:.3f} arcsec")
+        if err > MAX_ERROR:
+            raise ValueError(f"{name} interpolation error {err * 3600:.3f} arcsec exceeds bound")
+        max_error = max(max_error, err)
+
+    write_ephemeris(path, start, end, max_error * ERROR_MARGIN, arrays)
+    return path
+
+def write_ephemeris(path, start, end, max_error, arrays):
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, start, end, max_error, len(BODIES))
+    for name in BODIES:
+        header += BODY_HEADER.pack(STEPS[name], len(arrays[name]))
+    header += b'\0' * (-len(header) % 16)
+
+    # Write next to the target and rename, so running workers never map a
+    # half-written file
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        for name in BODIES:
+            f.write(np.ascontiguousarray(arrays[name], dtype='<f4').tobytes())
+    os.replace(tmp_path, path)
+
+def load_ephemeris(path=DEFAULT_PATH):
+    """
+    Maps an ephemeris file without reading its samples. Raises
+    StaleEphemerisError if the header does not match this code.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(HEADER.size + BODY_HEADER.size * len(BODIES))
+
+    magic, version, start, end, max_error, count = HEADER.unpack_from(head)
+    if magic != MAGIC:
+        raise StaleEphemerisError(f"{path} is not an ephemeris file")
+    if version != FORMAT_VERSION or count != len(BODIES):
+        raise StaleEphemerisError(f"{path} has format version {version}, expected {FORMAT_VERSION}; rebuild it")
+
+    steps = {}
+    sizes = {}
+    for k, name in enumerate(BODIES):
+        step, size = BODY_HEADER.unpack_from(head, HEADER.size + k * BODY_HEADER.size)
+        if step != STEPS[name]:
+            raise StaleEphemerisError(f"{path} samples {name} every {step} days, expected {STEPS[name]}; rebuild it")
+        steps[name] = step
+        sizes[name] = size
+
+    offset = HEADER.size + BODY_HEADER.size * len(BODIES)
+    offset += -offset % 16
+    data = np.memmap(path, dtype='<f4', mode='r', offset=offset, shape=(sum(sizes.values()),))
+
+    samples = {}
+    pos = 0
+    for name in BODIES:
+        samples[name] = data[pos:pos + sizes[name]]
+        pos += sizes[name]
+    return EphemerisTable(samples, start, end, steps, max_error)
+
+TABLE = None
+TABLE_LOADED = False
+
+def get_table():
+    """
+    Returns the shared EphemerisTable, or None if no table has been built.
+    """
+    global TABLE, TABLE_LOADED
+    if not TABLE_LOADED:
+        TABLE_LOADED = True
+        if os.path.exists(DEFAULT_PATH):
+            try:
+                TABLE = load_ephemeris(DEFAULT_PATH)
+            except (StaleEphemerisError, OSError, struct.error) as e:
+                print(f"Ephemeris table disabled, using live ephem: {e}")
+    return TABLE
+
+def get_tropical_longitudes(jd):
+    """
+    Tropical ecliptic longitudes (degrees) of BODIES for an array of Julian
+    dates, shape (len(jd), len(BODIES)). Uses the table where it covers the
+    date and live ephem elsewhere.
+    """
+    jd = np.asarray(jd, dtype=np.float64)
+    out = np.empty((len(jd), len(BODIES)))
+
+    table = get_table()
+    inside = table.covers(jd) if table is not None else np.zeros(len(jd), dtype=bool)
+    if inside.any():
+        for col, name in enumerate(BODIES):
+            out[inside, col] = table.longitudes(name, jd[inside])
+
+    outside = np.flatnonzero(~inside)
+    if len(outside):
+        bodies = [cls() for cls in BODIES.values()]
+        for row in outside:
+            for col, body in enumerate(bodies):
+                out[row, col] = live_longitude(body, jd[row])
+    return out
+
+def get_body_longitudes(name, jd):
+    """
+    Tropical longitudes of one body for an array of Julian dates.
+    """
+    jd = np.asarray(jd, dtype=np.float64)
+    out = np.empty(len(jd))
+
+    table = get_table()
+    inside = table.covers(jd) if table is not None else np.zeros(len(jd), dtype=bool)
+    if inside.any():
+        out[inside] = table.longitudes(name, jd[inside])
+    body = BODIES[name]()
+    for row in np.flatnonzero(~inside):
+        out[row] = live_longitude(body, jd[row])
+    return out
+
+def get_tropical_longitude(name, jd):
+    """
+    Tropical longitude of one body at a single Julian date.
+    """
+    table = get_table()
+    if table is not None and table.covers(jd):
+        return table.longitude_at(name, jd)
+    return live_longitude(BODIES[name](), jd)
+
+if __name__ == '__main__':
+    years = [int(a) for a in sys.argv[1:3]]
+    print(f"Written {build_ephemeris(DEFAULT_PATH, *years)}")
@@ -0,0 +1,164 @@
+import collections
+import concurrent.futures
+import functools
+import itertools
+import os
+import threading
+
+# Execution layer for CPU-bound chart and analysis work, shared by the web
+# endpoints and the bulk CLI. Chosen with VEDIC_EXECUTOR:
+#   inline (default)  run in the calling thread, as before
+#   thread            ThreadPoolExecutor (I/O overlap only; the GIL stays)
+#   process           pre-warmed ProcessPoolExecutor, one worker per core
+#                     across all web workers of the host
+#
+# Jobs must be module-level functions with picklable arguments and results
+# (Chart, dicts, tuples). Workers map the ephemeris table and import the
+# interpretation tables once, when they start.
+
+MODE = os.environ.get('VEDIC_EXECUTOR', 'inline')
+# Every web worker (gunicorn or uvicorn process) starts its own pool, so by
+# default the cores are split between them. WEB_CONCURRENCY is what both
+# servers read for their --workers default; set it (or VEDIC_WORKERS) when
+# passing --workers explicitly.
+WEB_WORKERS = max(1, int(os.environ.get('WEB_CONCURRENCY', 1)))
+WORKERS = int(os.environ.get('VEDIC_WORKERS', max(1, (os.cpu_count() or 1) // WEB_WORKERS)))
+# Jobs queued or running at once; submitters wait (or get QueueFull) beyond it
+MAX_PENDING = int(os.environ.get('VEDIC_MAX_PENDING', WORKERS * 4))
+# Seconds a caller waits for one job before JobTimeout
+TIMEOUT = float(os.environ.get('VEDIC_JOB_TIMEOUT', 30))
+CHUNK_SIZE = 256
+
+class QueueFull(Exception):
+    pass
+
+class JobTimeout(Exception):
+    pass
+
+def warm_worker():
+    # Pool initializer: load shared data before the first job arrives
+    import analysis_utils, chat_logic # Interpretation and karmic tables
+    from ephemeris_utils import get_table
+    get_table()
+
+def worker_pid():
+    return os.getpid()
+
+def run_chunk(func, chunk):
+    return [func(item) for item in chunk]
+
+class Executor:
+    """
+    Bounded front end to a thread or process pool (or none, inline).
+    At most `max_pending` jobs are queued or running at any time.
+    """
+
+    def __init__(self, mode=MODE, workers=WORKERS, max_pending=MAX_PENDING, timeout=TIMEOUT):
+        self.mode = mode
+        self.workers = workers
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(max_pending)
+        if mode == 'process':
+            self.pool = concurrent.futures.ProcessPoolExecutor(workers, initializer=warm_worker)
+        elif mode == 'thread':
+            self.pool = concurrent.futures.ThreadPoolExecutor(workers, initializer=warm_worker)
+        elif mode == 'inline':
+            self.pool = None
+        else:
+            raise ValueError(f"Unknown executor mode: {mode}")
+
+    def warm(self):
+        """
+        Starts every worker process now instead of on the first requests.
+        Returns the worker pids.
+        """
+        if self.pool is None:
+            warm_worker()
+            return [os.getpid()]
+        futures = [self.pool.submit(worker_pid) for _ in range(self.workers)]
+        return sorted({f.result() for f in futures})
+
+    def submit(self, func, *args, wait=None):
+        """
+        Queues func(*args) and returns a Future. Blocks while the queue is
+        full, up to `wait` seconds (forever if None), then raises QueueFull.
+        """
+        if self.pool is None:
+            future = concurrent.futures.Future()
+            try:
+                future.set_result(func(*args))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+        if not self.slots.acquire(timeout=wait):
+            raise QueueFull("Too many jobs queued, retry later")
+        try:
+            future = self.pool.submit(func, *args)
+        except Exception:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda f: self.slots.release())
+        return future
+
+    def run(self, func, *args, timeout=None):
+        """
+        func(*args) on the pool, waiting at most `timeout` seconds (default
+        self.timeout) for a queue slot and for the result. A process job
+        that times out still runs to completion in its worker.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        future = self.submit(func, *args, wait=timeout)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise JobTimeout(f"{getattr(func, '__name__', 'job')} did not finish in {timeout:g}s")
+
+    def map_chunks(self, func, items, chunk_size=CHUNK_SIZE, timeout=None):
+        """
+        Yields func(item) for every item, in order. Items are read lazily
+        and sent in chunks of `chunk_size`, so memory stays bounded by the
+        chunks in flight. `timeout` applies to each chunk.
+        """
+        return self.map_batches(functools.partial(run_chunk, func), items, chunk_size, timeout)
+
+    def map_batches(self, func, items, chunk_size=CHUNK_SIZE, timeout=None):
+        """
+        Like map_chunks, but func takes a whole chunk (a list) and returns
+        one result per item, for jobs that vectorize over the chunk.
+        """
+        items = iter(items)
+        in_flight = collections.deque()
+        depth = max(1, self.workers * 2) if self.pool is not None else 1
+        while True:
+            while len(in_flight) < depth:
+                chunk = list(itertools.islice(items, chunk_size))
+                if not chunk:
+                    break
+                in_flight.append(self.submit(func, chunk))
+            if not in_flight:
+                return
+            future = in_flight.popleft()
+            try:
+                results = future.result(timeout)
+            except concurrent.futures.TimeoutError:
+                for pending in in_flight:
+                    pending.cancel()
+                raise JobTimeout(f"Chunk did not finish in {timeout:g}s")
+            yield from results
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+
+EXECUTOR = None
+
+def get_executor():
+    """
+    Returns the shared Executor configured from the environment.
+    """
+    global EXECUTOR
+    if EXECUTOR is None:
+        EXECUTOR = Executor()
+    return EXECUTOR
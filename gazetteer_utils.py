@@ -0,0 +1,275 @@
+import os
+import struct
+import sys
+import unicodedata
+import numpy as np
+
+# Offline gazetteer for /suggest_place: place names from a GeoNames dump
+# (e.g. cities500.txt from https://download.geonames.org/export/dump/)
+# indexed by normalized name prefix.
+#
+# Build once with:  python gazetteer_utils.py cities500.txt [gazetteer.bin]
+# admin1CodesASCII.txt and countryInfo.txt next to the dump, if present, are
+# used for the "Patna, Bihar, India" style labels.
+#
+# File layout (little endian), memory-mapped read-only like the ephemeris:
+#   magic b'VGAZ', format version (u32), key width (u32), place count,
+#   key count, label bytes, zone bytes (u64), zero padding to 16 bytes, then
+#   places    PLACE_DTYPE records
+#   keys      sorted normalized names, KEY_WIDTH bytes each (truncated)
+#   key_place u32 place row of each key
+#   labels    UTF-8 display names, addressed by (label, label_len)
+#   zones     newline separated IANA zone names, addressed by tz
+# with every section padded to a 16 byte boundary.
+
+DEFAULT_PATH = os.environ.get(
+    'VEDIC_GAZETTEER', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gazetteer.bin'))
+
+MAGIC = b'VGAZ'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sIIQQQQ')
+
+# Longer names are compared on their first KEY_WIDTH bytes only
+KEY_WIDTH = 24
+
+PLACE_DTYPE = np.dtype([
+    ('lat', '<f4'), ('lon', '<f4'), ('population', '<u4'),
+    ('label', '<u4'), ('label_len', '<u2'), ('tz', '<u2'),
+])
+
+# GeoNames feature classes kept: populated places and administrative areas
+FEATURE_CLASSES = ('P', 'A')
+
+def normalize_name(text):
+    """
+    Lookup form of a place name: accents stripped, case folded, runs of
+    spaces and punctuation collapsed to one space. 'São  Paulo' -> 'sao paulo'.
+    """
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    words = []
+    word = []
+    for c in text.casefold():
+        if c.isalnum():
+            word.append(c)
+        elif word:
+            words.append(''.join(word))
+            word = []
+    if word:
+        words.append(''.join(word))
+    return ' '.join(words)
+
+def encode_key(text):
+    return normalize_name(text).encode('utf-8')[:KEY_WIDTH]
+
+def read_admin1_names(path):
+    # 'IN.34' -> 'Bihar'
+    names = {}
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                cols = line.rstrip('\n').split('\t')
+                if len(cols) >= 2:
+                    names[cols[0]] = cols[1]
+    return names
+
+def read_country_names(path):
+    # 'IN' -> 'India'
+    names = {}
+    if path and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('#'):
+                    continue
+                cols = line.rstrip('\n').split('\t')
+                if len(cols) >= 5:
+                    names[cols[0]] = cols[4]
+    return names
+
+def read_geonames(path, admin1_names=None, country_names=None):
+    """
+    Yields (label, names, lat, lon, population, timezone) for every
+    populated place or administrative area in a GeoNames dump.
+    """
+    admin1_names = admin1_names or {}
+    country_names = country_names or {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            cols = line.rstrip('\n').split('\t')
+            if len(cols) < 18 or cols[6] not in FEATURE_CLASSES:
+                continue
+            name, ascii_name, country = cols[1], cols[2], cols[8]
+
+            parts = [name]
+            admin1 = admin1_names.get(f"{country}.{cols[10]}")
+            if admin1 and admin1 != name:
+                parts.append(admin1)
+            parts.append(country_names.get(country, country))
+
+            population = int(cols[14]) if cols[14] else 0
+            yield (', '.join(p for p in parts if p), {name, ascii_name},
+                   float(cols[4]), float(cols[5]), population, cols[17])
+
+def build_gazetteer(places_path, path=DEFAULT_PATH):
+    """
+    Indexes a GeoNames dump and writes the gazetteer file.
+    """
+    folder = os.path.dirname(os.path.abspath(places_path))
+    admin1_names = read_admin1_names(os.path.join(folder, 'admin1CodesASCII.txt'))
+    country_names = read_country_names(os.path.join(folder, 'countryInfo.txt'))
+
+    places = []
+    keys = []
+    labels = bytearray()
+    zones = {}
+    for label, names, lat, lon, population, zone in read_geonames(places_path, admin1_names, country_names):
+        row = len(places)
+        encoded = label.encode('utf-8')[:0xffff]
+        tz = zones.setdefault(zone, len(zones))
+        places.append((lat, lon, min(population, 0xffffffff), len(labels), len(encoded), tz))
+        labels += encoded
+        for key in {encode_key(n) for n in names}:
+            if key:
+                keys.append((key, row))
+
+    keys.sort()
+    key_array = np.array([k for k, _ in keys], dtype=f'S{KEY_WIDTH}')
+    key_place = np.array([r for _, r in keys], dtype='<u4')
+    place_array = np.array(places, dtype=PLACE_DTYPE)
+    zone_blob = '\n'.join(zones).encode('utf-8')
+
+    write_gazetteer(path, place_array, key_array, key_place, bytes(labels), zone_blob)
+    print(f"{len(places)} places, {len(keys)} keys, {len(zones)} zones")
+    return path
+
+def write_gazetteer(path, places, keys, key_place, labels, zones):
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, KEY_WIDTH, len(places), len(keys), len(labels), len(zones))
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        for section in (header, places.tobytes(), keys.tobytes(), key_place.tobytes(), labels, zones):
+            f.write(section)
+            f.write(b'\0' * (-len(section) % 16))
+    os.replace(tmp_path, path)
+
+class StaleGazetteerError(Exception):
+    pass
+
+class Gazetteer:
+    """
+    Read-only view over a memory-mapped gazetteer file.
+    """
+
+    def __init__(self, places, keys, key_place, labels, zones):
+        self.places = places
+        self.keys = keys
+        self.key_place = key_place
+        self.labels = labels
+        self.zones = zones
+
+    def __len__(self):
+        return len(self.places)
+
+    def prefix_range(self, key):
+        # Rows [lo, hi) of self.keys starting with `key`
+        lo = int(np.searchsorted(self.keys, key, 'left'))
+        if len(key) >= KEY_WIDTH:
+            hi = int(np.searchsorted(self.keys, key, 'right'))
+        else:
+            # 0xff never occurs in UTF-8, so this sorts after every extension
+            hi = int(np.searchsorted(self.keys, key + b'\xff', 'left'))
+        return lo, hi
+
+    def place(self, row):
+        rec = self.places[row]
+        start = int(rec['label'])
+        return {
+            'display_name': self.labels[start:start + int(rec['label_len'])].tobytes().decode('utf-8'),
+            'lat': round(float(rec['lat']), 5),
+            'lon': round(float(rec['lon']), 5),
+            'timezone': self.zones[int(rec['tz'])],
+        }
+
+    def matches(self, key, limit=20):
+        """
+        Places whose name starts with the encoded `key`, best first: exact
+        name matches, then by population. Returns (matches, complete) where
+        each match is (keys, population, place) with the index keys the
+        place matched through, and complete is True when every match is
+        included, so longer prefixes can be answered by filtering.
+        """
+        lo, hi = self.prefix_range(key)
+        if lo == hi:
+            return [], True
+
+        rows = np.asarray(self.key_place[lo:hi], dtype=np.int64)
+        keys = np.asarray(self.keys[lo:hi])
+        population = self.places['population'][rows].astype(np.int64)
+        score = population.copy()
+        score[keys == key] += 1 << 32
+
+        # A place can match through both its name and its ASCII name, so
+        # take a few extra before de-duplicating
+        take = min(len(rows), limit * 2)
+        if take < len(rows):
+            top = np.argpartition(-score, take - 1)[:take]
+        else:
+            top = np.arange(len(rows))
+        top = top[np.argsort(-score[top], kind='stable')]
+
+        results = []
+        by_row = {}
+        for i in top.tolist():
+            row = int(rows[i])
+            if row in by_row:
+                by_row[row][0].append(bytes(keys[i]))
+            elif len(results) < limit:
+                by_row[row] = ([bytes(keys[i])], int(population[i]), self.place(row))
+                results.append(by_row[row])
+        complete = take == len(rows) and len(results) < limit
+        return [(tuple(k), pop, place) for k, pop, place in results], complete
+
+def load_gazetteer(path=DEFAULT_PATH):
+    """
+    Maps a gazetteer file. Raises StaleGazetteerError if the header does
+    not match this code.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(HEADER.size)
+    magic, version, key_width, place_count, key_count, label_bytes, zone_bytes = HEADER.unpack_from(head)
+    if magic != MAGIC:
+        raise StaleGazetteerError(f"{path} is not a gazetteer file")
+    if version != FORMAT_VERSION or key_width != KEY_WIDTH:
+        raise StaleGazetteerError(f"{path} has format version {version}, expected {FORMAT_VERSION}; rebuild it")
+
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    sections = []
+    offset = HEADER.size + (-HEADER.size % 16)
+    for dtype, count in ((PLACE_DTYPE, place_count), (np.dtype(f'S{KEY_WIDTH}'), key_count),
+                         (np.dtype('<u4'), key_count), (np.dtype(np.uint8), label_bytes)):
+        size = dtype.itemsize * count
+        sections.append(data[offset:offset + size].view(dtype))
+        offset += size + (-size % 16)
+    zones = data[offset:offset + zone_bytes].tobytes().decode('utf-8').split('\n')
+    return Gazetteer(*sections, zones)
+
+GAZETTEER = None
+GAZETTEER_LOADED = False
+
+def get_gazetteer():
+    """
+    Returns the shared Gazetteer, or None if no gazetteer has been built.
+    """
+    global GAZETTEER, GAZETTEER_LOADED
+    if not GAZETTEER_LOADED:
+        GAZETTEER_LOADED = True
+        if os.path.exists(DEFAULT_PATH):
+            try:
+                GAZETTEER = load_gazetteer(DEFAULT_PATH)
+            except (StaleGazetteerError, OSError, struct.error, ValueError) as e:
+                print(f"Gazetteer disabled, using Nominatim: {e}")
+    return GAZETTEER
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        sys.exit("usage: python gazetteer_utils.py cities500.txt [gazetteer.bin]")
+    print(f"Written {build_gazetteer(sys.argv[1], *sys.argv[2:3])}")
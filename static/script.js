@@ -17,6 +17,8 @@ document.addEventListener('DOMContentLoaded', () => {
     const btnAnalyze = document.getElementById('btn-analyze');
     const analysisSection = document.getElementById('analysis-section');
     let lastFormData = null; // Store form data for analysis request
+    let lastChartId = null; // Handle from /get_chart, sent instead of the full payload
+    let selectedZone = null; // IANA zone of the picked place; the server resolves the offset
 
     if (manualCheckbox) {
         manualCheckbox.addEventListener('change', () => {
@@ -24,6 +26,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 coordsRow.classList.remove('hidden');
                 placeInput.disabled = true;
                 placeInput.value = ''; // Clear place name to avoid confusion
+                selectedZone = null;
             } else {
                 coordsRow.classList.add('hidden');
                 placeInput.disabled = false;
@@ -31,11 +34,17 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
+    // A typed offset overrides the zone of the picked place
+    document.getElementById('tz').addEventListener('input', () => {
+        selectedZone = null;
+    });
+
     let debounceTimer;
 
     // Place Autocomplete
     placeInput.addEventListener('input', () => {
         clearTimeout(debounceTimer);
+        selectedZone = null;
         const query = placeInput.value;
         if (query.length < 1) {
             suggestionsBox.style.display = 'none';
@@ -57,6 +66,7 @@ document.addEventListener('DOMContentLoaded', () => {
                             placeInput.value = place.display_name;
                             latInput.value = place.lat;
                             lonInput.value = place.lon;
+                            selectedZone = place.timezone || null;
                             suggestionsBox.style.display = 'none';
                         });
                         suggestionsBox.appendChild(div);
@@ -93,7 +103,9 @@ document.addEventListener('DOMContentLoaded', () => {
             return;
         }
 
-        const payload = { name, dob, tob, lat, lon, tz };
+        const payload = selectedZone
+            ? { name, dob, tob, lat, lon, zone: selectedZone }
+            : { name, dob, tob, lat, lon, tz };
 
         try {
             const res = await fetch('/get_chart', {
@@ -117,6 +129,10 @@ document.addEventListener('DOMContentLoaded', () => {
                 if (analysisSection) analysisSection.classList.add('hidden');
                 lastFormData = payload;
             }
+            lastChartId = data.chart_id || null;
+            if (data.tz !== undefined) {
+                document.getElementById('tz').value = data.tz;
+            }
 
         } catch (err) {
             console.error('Error:', err);
@@ -304,7 +320,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 const response = await fetch('/analyze', {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify(lastFormData)
+                    body: JSON.stringify(lastChartId ? { ...lastFormData, chart_id: lastChartId } : lastFormData)
                 });
 
                 if (!response.ok) throw new Error('Analysis failed');
@@ -470,8 +486,10 @@ document.addEventListener('DOMContentLoaded', () => {
             const response = await fetch('/chat', {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
+                // chart_params too, in case the server no longer knows the id
                 body: JSON.stringify({
                     question: question,
+                    chart_id: lastChartId,
                     chart_params: lastFormData
                 })
             });
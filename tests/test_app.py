@@ -0,0 +1,102 @@
+import pytest
+
+import app as web
+
+BIRTH = {"dob": "1990-12-08", "tob": "22:35", "lat": 25.77, "lon": 85.87, "tz": 5.5}
+
+@pytest.fixture
+def client():
+    return web.app.test_client()
+
+def test_dashas_window(client):
+    r = client.post('/dashas', json=dict(BIRTH, depth=3, **{'from': '2024-01-01', 'to': '2026-01-01'}))
+    assert r.status_code == 200
+    assert r.json and all(p['Level'] == 'Pratyantar' for p in r.json)
+
+@pytest.mark.parametrize('window', [
+    {'depth': 6, 'from': '1900-01-01', 'to': '2200-01-01'},
+    {'depth': 3, 'from': '2026-01-01', 'to': '2026-01-01'},
+    {'depth': 3, 'from': '2026-01-01', 'to': '2025-01-01'},
+    {'depth': 7},
+])
+def test_dashas_rejects_oversized_or_empty_windows(client, window):
+    r = client.post('/dashas', json=dict(BIRTH, **window))
+    assert r.status_code == 400
+    assert 'error' in r.json
+
+@pytest.mark.parametrize('route', ['/get_chart', '/analyze', '/dashas'])
+@pytest.mark.parametrize('change', [{'lat': None}, {'lon': ''}, {'lat': 'north'}, {'dob': None}])
+def test_bad_birth_params_are_400(client, route, change):
+    r = client.post(route, json=dict(BIRTH, **change))
+    assert r.status_code == 400
+    assert 'error' in r.json
+
+@pytest.mark.parametrize('params', ['not an object', ['list'], {'dob': '1990-12-08'}])
+def test_chat_with_bad_chart_params_is_400(client, params):
+    r = client.post('/chat', json={'question': 'How is my career?', 'chart_params': params})
+    assert r.status_code == 400
+
+def test_batch_reports_missing_coordinates_per_record(client):
+    body = '{"dob": "1990-12-08", "tob": "22:35", "lon": 85.87}\n' + web.json.dumps(BIRTH) + '\n'
+    r = client.post('/analyze_batch', data=body, content_type='application/x-ndjson')
+    lines = [web.json.loads(line) for line in r.data.decode().splitlines()]
+    assert lines[0]['error'] == "Missing birth data: lat"
+    assert 'error' not in lines[1]
+
+@pytest.mark.parametrize('include', ['', ' , ', []])
+def test_empty_include_is_400(client, include):
+    r = client.post('/analyze', json=dict(BIRTH, include=include))
+    assert r.status_code == 400
+
+def test_include_selects_sections(client):
+    r = client.post('/analyze', json=dict(BIRTH, include='manglik, yogas'))
+    assert r.status_code == 200
+    assert set(r.json) == {'manglik', 'yogas'}
+    assert client.post('/analyze', json=dict(BIRTH, include=['nope'])).status_code == 400
+    assert len(client.post('/analyze', json=BIRTH).json) == 6
+
+@pytest.mark.parametrize('change', [
+    {'tz': 'inf'}, {'tz': 1e20}, {'tz': 'nan'}, {'tz': 14.5}, {'tz': 'abc'},
+    {'lat': 90.5}, {'lat': 'nan'}, {'lon': -181}, {'lon': '-inf'},
+])
+def test_out_of_range_birth_params_are_400(client, change):
+    r = client.post('/get_chart', json=dict(BIRTH, **change))
+    assert r.status_code == 400
+    assert 'error' in r.json
+
+def test_batch_reports_out_of_range_tz_per_record(client):
+    r = client.post('/analyze_batch', json=[dict(BIRTH, tz='inf'), BIRTH])
+    lines = [web.json.loads(line) for line in r.data.decode().splitlines()]
+    assert lines[0]['error'].startswith("tz must be between")
+    assert 'error' not in lines[1]
+
+@pytest.mark.parametrize('body, content_type, status', [
+    ('{"births": "nope"}', 'application/json', 400),
+    ('{"dob": ', 'application/json', 400),
+    ('"just a string"', 'application/json', 400),
+    ('[]', 'text/plain', 415),
+])
+def test_malformed_batch_requests_are_rejected_before_streaming(client, body, content_type, status):
+    r = client.post('/analyze_batch', data=body, content_type=content_type)
+    assert r.status_code == status
+    assert 'error' in r.json
+
+def test_batch_streams_per_record_errors(client):
+    body = 'not json\n' + web.json.dumps(BIRTH) + '\n'
+    r = client.post('/analyze_batch', data=body, content_type='application/x-ndjson')
+    assert r.status_code == 200
+    lines = [web.json.loads(line) for line in r.data.decode().splitlines()]
+    assert lines[0]['error'] == "Expected a JSON object" and 'fatal' not in lines[0]
+    assert lines[1]['index'] == 1 and 'yogas' in lines[1]
+
+def test_chart_id_round_trip_and_fallback(client):
+    chart_id = client.post('/get_chart', json=BIRTH).json['chart_id']
+    assert BIRTH['dob'] not in chart_id
+    assert client.post('/analyze', json={'chart_id': chart_id, 'include': 'manglik'}).status_code == 200
+    assert client.post('/analyze', json={'chart_id': 'unknown'}).status_code == 400
+    assert client.post('/analyze', json=dict(BIRTH, chart_id='unknown')).status_code == 200
+    r = client.post('/chat', json={'question': 'How is my career?', 'chart_id': 'unknown', 'chart_params': BIRTH})
+    assert r.status_code == 200
+    r = client.post('/analyze_batch', json=[{'chart_id': chart_id}, {'chart_id': 'unknown'}])
+    reports = [web.json.loads(line) for line in r.data.decode().splitlines()]
+    assert 'error' not in reports[0] and reports[1]['error'] == "Unknown or expired chart_id"
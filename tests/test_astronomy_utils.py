@@ -0,0 +1,69 @@
+import datetime
+import math
+
+import ephem
+import numpy as np
+import pytest
+
+from astronomy_utils import (LAHIRI_AT_EPOCH, LAHIRI_EPOCH, SIDEREAL_BODIES, J2000, delta_t,
+                             get_sidereal_longitudes, get_sidereal_positions, lahiri_ayanamsa,
+                             mean_node, sidereal_longitude, sidereal_longitudes, true_node)
+from ephemeris_utils import EPHEM_EPOCH_JD
+from transit_utils import to_jd, transit_sign
+
+def angle_diff(a, b):
+    return np.abs((np.asarray(a) - np.asarray(b) + 180) % 360 - 180)
+
+def test_delta_t_reference_values():
+    # Espenak & Meeus table values (seconds)
+    assert delta_t(J2000) == pytest.approx(63.8, abs=0.5)
+    assert delta_t(to_jd(datetime.date(1950, 1, 1))) == pytest.approx(29.1, abs=0.5)
+    assert delta_t(to_jd(datetime.date(1900, 1, 1))) == pytest.approx(-2.8, abs=0.5)
+
+def test_lahiri_reference_values():
+    # The definition, and published mean Lahiri values
+    assert lahiri_ayanamsa(LAHIRI_EPOCH) == pytest.approx(LAHIRI_AT_EPOCH, abs=0.001)
+    assert lahiri_ayanamsa(J2000) == pytest.approx(23.857, abs=0.002)
+    assert lahiri_ayanamsa(to_jd(datetime.date(2024, 1, 1))) == pytest.approx(24.192, abs=0.003)
+
+def test_ayanamsa_follows_precession_rate():
+    per_year = lahiri_ayanamsa(J2000 + 365.25) - lahiri_ayanamsa(J2000)
+    assert per_year * 3600 == pytest.approx(50.29, abs=0.05)
+
+def test_mean_and_true_node():
+    assert mean_node(J2000) == pytest.approx(125.04, abs=0.01)
+    jd = J2000 + np.arange(0, 6800, 13.0)
+    gap = angle_diff(true_node(jd), mean_node(jd))
+    # Sum of the periodic term amplitudes is just under 2 degrees
+    assert 1.5 < gap.max() < 2.0
+
+@pytest.mark.parametrize('year', [1930, 1975, 2050])
+def test_sidereal_planets_match_the_of_date_frame(year):
+    # Planets: J2000-frame longitude - ayanamsa(J2000) must equal the
+    # equinox-of-date longitude - ayanamsa(date)
+    jd = to_jd(datetime.date(year, 6, 1))
+    date = ephem.Date(jd - EPHEM_EPOCH_JD)
+    for name, cls in (('Sun', ephem.Sun), ('Mars', ephem.Mars), ('Saturn', ephem.Saturn)):
+        body = cls()
+        body.compute(date, epoch=date)
+        of_date = math.degrees(ephem.Ecliptic(body, epoch=date).lon)
+        assert angle_diff(sidereal_longitude(name, jd), of_date - lahiri_ayanamsa(jd)) < 0.01, name
+
+def test_scalar_vector_and_batch_paths_agree():
+    jd = to_jd(datetime.date(1990, 12, 8)) + np.linspace(0, 3000, 7)
+    batch = get_sidereal_longitudes(jd)
+    for col, name in enumerate(SIDEREAL_BODIES):
+        vector = sidereal_longitudes(name, jd)
+        assert angle_diff(vector, batch[:, col]).max() < 1e-6
+        for k, x in enumerate(jd):
+            assert angle_diff(sidereal_longitude(name, x), vector[k]) < 1e-6
+            assert angle_diff(get_sidereal_positions(x)[name], vector[k]) < 1e-6
+    assert angle_diff(batch[:, -1], (batch[:, -2] + 180) % 360).max() < 1e-9
+
+@pytest.mark.parametrize('planet, before, after, sign', [
+    ('Saturn', datetime.date(2025, 3, 28), datetime.date(2025, 3, 30), 11), # Pisces
+    ('Rahu', datetime.date(2025, 5, 17), datetime.date(2025, 5, 19), 10),   # Aquarius
+])
+def test_published_ingress_dates(planet, before, after, sign):
+    assert transit_sign(planet, to_jd(before)) != sign
+    assert transit_sign(planet, to_jd(after)) == sign
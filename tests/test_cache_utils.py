@@ -0,0 +1,197 @@
+import base64
+import time
+
+import pytest
+
+from astrology_utils import calculate_chart
+from cache_utils import ChartCache, MemoryBackend, make_backend, normalize_birth
+
+BIRTH = ("1990-12-08", "22:35", 25.77, 85.87, 5.5)
+
+@pytest.fixture(params=['memory', 'sqlite', 'local-redis'])
+def backend(request, tmp_path):
+    url = f"sqlite:///{tmp_path / 'cache.db'}" if request.param == 'sqlite' else request.param
+    return make_backend(url, max_entries=2)
+
+def test_backend_round_trip_and_delete(backend):
+    backend.set('a', {'x': 1})
+    assert backend.get('a') == {'x': 1}
+    backend.delete('a')
+    assert backend.get('a') is None
+
+def test_backend_expiry(backend):
+    backend.set('a', 1, ttl=0.01)
+    time.sleep(1.1 if 'Redis' in type(backend).__name__ else 0.05)
+    assert backend.get('a') is None
+
+def test_backend_evicts_least_recently_used(backend):
+    backend.set('a', 1)
+    time.sleep(0.01)
+    backend.set('b', 2)
+    time.sleep(0.01)
+    backend.get('a')
+    time.sleep(0.01)
+    backend.set('c', 3)
+    assert backend.get('b') is None
+    assert backend.get('a') == 1 and backend.get('c') == 3
+
+def counting_compute():
+    calls = []
+    def compute(*args):
+        calls.append(args)
+        return calculate_chart(*args)
+    return compute, calls
+
+def test_chart_cache_hit_and_miss():
+    compute, calls = counting_compute()
+    cache = ChartCache(compute, MemoryBackend())
+    first = cache.get_chart(*BIRTH)
+    # Same birth data in another spelling is the same entry
+    second = cache.get_chart("1990-12-8", "22:35", "25.77", "85.87", "5.5")
+    assert len(calls) == 1
+    assert second is first
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+def test_chart_cache_pickling_backend(tmp_path):
+    compute, calls = counting_compute()
+    cache = ChartCache(compute, make_backend(f"sqlite:///{tmp_path / 'cache.db'}"))
+    first = cache.get_chart(*BIRTH)
+    second = cache.get_chart(*BIRTH)
+    assert len(calls) == 1
+    assert list(second.lons) == list(first.lons)
+    assert second.to_dict() == first.to_dict()
+
+def test_cached_chart_carries_no_name():
+    compute, _ = counting_compute()
+    cache = ChartCache(compute, MemoryBackend())
+    chart = cache.get_chart(*BIRTH)
+    assert chart.name is None
+    assert chart.to_dict(name="Asha")['details']['Name'] == "Asha"
+    assert cache.get_chart(*BIRTH).to_dict(name="Ravi")['details']['Name'] == "Ravi"
+    assert chart.name is None
+
+def test_views_built_on_a_hit_are_kept():
+    compute, _ = counting_compute()
+    cache = ChartCache(compute, MemoryBackend())
+    dasha = cache.get_chart(*BIRTH).dasha
+    index = dasha.index(2)
+    again = cache.get_chart(*BIRTH)
+    assert again.dasha is dasha
+    assert again.dasha.index(2) is index
+
+def test_chart_id_round_trip():
+    compute, _ = counting_compute()
+    cache = ChartCache(compute, MemoryBackend())
+    chart_id = cache.chart_id("1990-12-8", "22:35", 25.77, 85.87, 5.5)
+    assert chart_id == cache.chart_id(*BIRTH)
+    assert cache.birth_of(chart_id) == normalize_birth(*BIRTH)
+    assert cache.get_chart_by_id(chart_id) is cache.get_chart(*BIRTH)
+
+def test_chart_id_is_opaque():
+    compute, _ = counting_compute()
+    chart_id = ChartCache(compute, MemoryBackend()).chart_id(*BIRTH)
+    assert '1990' not in base64.urlsafe_b64decode(chart_id).decode('latin-1')
+    other = ChartCache(compute, MemoryBackend(), secret=b'other')
+    assert other.chart_id(*BIRTH) != chart_id
+
+@pytest.mark.parametrize('chart_id', ['', 'not-an-id', None, 42])
+def test_unknown_chart_id(chart_id):
+    compute, _ = counting_compute()
+    cache = ChartCache(compute, MemoryBackend())
+    cache.chart_id(*BIRTH)
+    with pytest.raises(ValueError):
+        cache.get_chart_by_id(chart_id)
+
+def test_resolve_ids():
+    compute, _ = counting_compute()
+    cache = ChartCache(compute, MemoryBackend())
+    chart_id = cache.chart_id(*BIRTH)
+    records = [{'name': "Asha", 'chart_id': chart_id, 'zone': "Asia/Kolkata"}, {'chart_id': 'gone'}, "x"]
+    resolved = list(cache.resolve_ids(records))
+    dob, tob, lat, lon, tz = normalize_birth(*BIRTH)
+    assert resolved[0] == {'name': "Asha", 'dob': dob, 'tob': tob, 'lat': lat, 'lon': lon, 'tz': tz}
+    assert resolved[1:] == records[1:]
+
+from cache_utils import SuggestionCache
+from gazetteer_utils import encode_key
+
+PLACES = {b'patna': ('Patna', 2000000), b'pathankot': ('Pathankot', 150000), b'paris': ('Paris', 2100000)}
+
+class FakeLookup:
+    """
+    Gazetteer-like lookup: complete results for known prefixes, and a
+    Nominatim-like incomplete fallback for anything else.
+    """
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, key, query, limit):
+        self.queries.append(query)
+        matches = [((k,), pop, name) for k, (name, pop) in PLACES.items() if k.startswith(key)]
+        matches.sort(key=lambda m: -m[1])
+        if not matches:
+            return [((), 0, 'nominatim:' + query)], False
+        return matches, True
+
+def test_complete_prefix_answers_longer_queries():
+    lookup = FakeLookup()
+    cache = SuggestionCache(lookup, encode_key)
+    assert cache.suggest('Pa') == ['Paris', 'Patna', 'Pathankot']
+    assert cache.suggest('Pat') == ['Patna', 'Pathankot']
+    assert cache.suggest('Patn') == ['Patna']
+    assert cache.suggest('Patn') == ['Patna']
+    assert lookup.queries == ['Pa']
+    assert cache.stats()['filtered'] == 2 and cache.stats()['hits'] == 1
+
+def test_empty_prefix_filter_falls_back_upstream():
+    lookup = FakeLookup()
+    cache = SuggestionCache(lookup, encode_key)
+    assert cache.suggest('Pa')
+    assert cache.suggest('Paciano, Umbria') == ['nominatim:Paciano, Umbria']
+    # Passed upstream as typed, not as the folded key
+    assert lookup.queries == ['Pa', 'Paciano, Umbria']
+    # The incomplete fallback answer is cached for its own key only
+    assert cache.suggest('Paciano, Umbria') == ['nominatim:Paciano, Umbria']
+    assert cache.suggest('Paciano, Umbria, Italy') == ['nominatim:Paciano, Umbria, Italy']
+    assert len(lookup.queries) == 3
+
+def test_failed_store_still_releases_the_flight():
+    class BrokenBackend(MemoryBackend):
+        def set(self, key, value, ttl=None):
+            raise OSError("backend down")
+
+    cache = SuggestionCache(FakeLookup(), encode_key, backend=BrokenBackend())
+    with pytest.raises(OSError):
+        cache.suggest('Patna')
+    assert cache.in_flight == {}
+
+def test_lookup_error_releases_the_flight():
+    def failing(key, query, limit):
+        raise RuntimeError("upstream down")
+
+    cache = SuggestionCache(failing, encode_key)
+    with pytest.raises(RuntimeError):
+        cache.suggest('Patna')
+    assert cache.in_flight == {}
+
+def test_cancelled_async_leader_releases_waiters():
+    import asyncio
+
+    async def slow(key, query, limit):
+        await asyncio.sleep(10)
+
+    async def scenario():
+        cache = SuggestionCache(None, encode_key)
+        leader = asyncio.create_task(cache.suggest_async('Patna', slow))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(cache.suggest_async('Patna', slow))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        with pytest.raises(RuntimeError):
+            await asyncio.wait_for(waiter, 1)
+        assert cache.in_flight == {}
+
+    asyncio.run(scenario())
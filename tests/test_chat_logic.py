@@ -0,0 +1,55 @@
+import pytest
+
+from chat_logic import TOPICS, TopicMatcher, rank_topics, process_question
+from astrology_utils import calculate_chart
+
+def top(question):
+    ranked = rank_topics(question)
+    return ranked[0][0] if ranked else None
+
+@pytest.mark.parametrize('question, topic', [
+    ("How is my career?", "career"),          # not 'car' -> home
+    ("my health", "health"),                  # specific beats generic self
+    ("Will I get a job?", "job"),             # shared keyword, TOPICS order
+    ("Tell me about myself", "self"),
+    ("Is my business partner loyal?", "marriage"), # longest keyword wins
+    ("I am working too hard", "career"),
+    ("Will studying abroad pay off?", "education"),
+    ("My kids and my children", "children"),
+    ("मेरी शादी कब होगी?", "marriage"),
+    ("naukri kab milegi", "job"),
+    ("मेरी पढ़ाई कैसी रहेगी", "education"),
+    ("Who cares about anything?", None),       # no 'car' in 'cares'
+    ("Personally speaking", None),
+])
+def test_topic_detection(question, topic):
+    assert top(question) == topic
+
+def test_ranking_scores_and_ties():
+    matcher = TopicMatcher({
+        'general': {'keywords': ['health', 'body']},
+        'health': {'keywords': ['health', 'illness']},
+        'money': {'keywords': ['money']},
+    }, generic=('general',))
+    # Shared keyword: split score, specific topic first
+    assert matcher.rank("health") == [('health', 0.5), ('general', 0.5)]
+    # Higher score wins over specificity
+    assert matcher.rank("body health")[0] == ('general', 1.5)
+    # Equal scores: first mention wins
+    assert [t for t, _ in matcher.rank("money and illness")] == ['money', 'health']
+    assert [t for t, _ in matcher.rank("illness and money")] == ['health', 'money']
+
+def test_matching_is_case_and_plural_insensitive():
+    assert top("FINANCES") == "wealth"
+    assert top("Brothers?") == "siblings"
+    assert top("my studies") == "education"
+
+def test_every_keyword_detects_its_topic():
+    for topic, data in TOPICS.items():
+        for kw in data['keywords']:
+            assert topic in dict(rank_topics(f"about {kw}?")), (topic, kw)
+
+def test_unknown_question():
+    chart = calculate_chart("Test", "1990-12-08", "22:35", 25.77, 85.87, 5.5)
+    assert process_question("hello there", chart)['topic'] == "Unknown"
+    assert process_question("How is my career?", chart)['topic'] == "Career"
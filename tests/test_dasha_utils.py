@@ -0,0 +1,87 @@
+import datetime
+
+import pytest
+
+from dasha_utils import DashaTimeline, DASHA_LORDS, YEAR_DAYS, to_day_number
+
+BIRTH = datetime.datetime(1990, 12, 8, 22, 35)
+
+@pytest.fixture
+def timeline():
+    return DashaTimeline(123.456, BIRTH)
+
+def test_mahadashas_span_one_cycle(timeline):
+    mds = list(timeline.mahadashas())
+    assert len(mds) == 9
+    assert mds[0].start <= timeline.birth < mds[0].end
+    assert timeline.end - mds[0].start == pytest.approx(120 * YEAR_DAYS)
+
+@pytest.mark.parametrize('depth', [1, 2, 3])
+def test_index_at_matches_a_linear_scan(timeline, depth):
+    index = timeline.index(depth)
+    days = [timeline.birth + k * 97.3 for k in range(int((timeline.end - timeline.birth) / 97.3))]
+    for day in days:
+        expected = next(p for p in index.periods if p.contains(day))
+        assert index.at(day) is expected
+    assert index.at(timeline.birth - 1) is None
+    assert index.at(timeline.end) is None
+
+@pytest.mark.parametrize('depth', [1, 2])
+def test_next_for_lords_matches_a_linear_scan(timeline, depth):
+    index = timeline.index(depth)
+    for lords in (["Saturn"], ["Venus", "Moon"], DASHA_LORDS):
+        for k in range(0, 120, 7):
+            day = timeline.birth + k * YEAR_DAYS
+            expected = next((p for p in index.periods if p.start > day and p.lord in lords), None)
+            assert index.next_for_lords(lords, day) is expected
+    assert index.next_for_lords(["Pluto"], timeline.birth) is None
+
+def test_index_is_built_once(timeline):
+    assert timeline.index(2) is timeline.index(2)
+
+@pytest.mark.parametrize('depth', [1, 2, 3, 4])
+def test_periods_between_covers_the_window_exactly(timeline, depth):
+    start, end = datetime.date(2020, 3, 1), datetime.date(2023, 9, 1)
+    periods = list(timeline.periods_between(start, end, depth))
+    lo, hi = to_day_number(start), to_day_number(end)
+    assert periods
+    assert all(p.level == depth for p in periods)
+    # Contiguous, and every one overlaps [start, end)
+    assert all(a.end == b.start for a, b in zip(periods, periods[1:]))
+    assert all(p.end > lo and p.start < hi for p in periods)
+    assert periods[0].start <= lo < periods[0].end
+    assert periods[-1].start < hi <= periods[-1].end
+    if depth <= 3:
+        expected = [p for p in timeline.index(depth).periods if p.end > lo and p.start < hi]
+        assert [p.path for p in periods] == [p.path for p in expected]
+
+def test_periods_between_is_clipped_to_the_timeline(timeline):
+    periods = list(timeline.periods_between(datetime.date(1900, 1, 1), datetime.date(2200, 1, 1), 1))
+    assert len(periods) == 9
+    assert periods[0].shown_start == timeline.birth
+    assert list(timeline.periods_between(datetime.date(2020, 1, 1), datetime.date(2019, 1, 1), 2)) == []
+    assert list(timeline.periods_between(datetime.date(1900, 1, 1), datetime.date(1980, 1, 1), 2)) == []
+
+@pytest.mark.parametrize('depth', [2, 4, 6])
+def test_period_at_on_period_boundaries(timeline, depth):
+    for period in list(timeline.periods_between(datetime.date(2030, 1, 1), datetime.date(2030, 2, 1), depth)):
+        for day in (period.start, period.end):
+            chain = timeline.period_at(day, depth)
+            if chain is None:
+                assert not timeline.birth <= day < timeline.end
+                continue
+            assert len(chain) == depth
+            assert [p.lord for p in chain] == list(chain[-1].path)
+            assert chain[-1].start <= day <= chain[-1].end
+
+def test_period_at_outside_the_timeline(timeline):
+    assert timeline.period_at(timeline.birth - 1) is None
+    assert timeline.period_at(timeline.end) is None
+    last = timeline.period_at(timeline.end - 1e-9, 6)
+    assert [p.lord for p in last][:1] == [timeline.md_lords[-1]]
+
+def test_find_next_uses_the_index(timeline):
+    when = datetime.date(2030, 1, 1)
+    assert timeline.find_next(["Saturn"], when, 2) is timeline.index(2).next_for_lords(["Saturn"], when)
+    first = timeline.find_next(DASHA_LORDS)
+    assert first.start > timeline.birth and first.level == 1
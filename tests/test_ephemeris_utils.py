@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+import ephemeris_utils
+from ephemeris_utils import BODIES, build_ephemeris, load_ephemeris, live_longitude
+
+# Interpolation plus float32 storage; the build itself checks MAX_ERROR
+TOLERANCE = 2.0 / 3600.0
+
+def angle_diff(a, b):
+    return np.abs((np.asarray(a) - np.asarray(b) + 180) % 360 - 180)
+
+@pytest.fixture(scope='module')
+def table(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('ephemeris') / 'ephemeris.bin')
+    build_ephemeris(path, 2000, 2000)
+    return load_ephemeris(path)
+
+@pytest.fixture
+def use_table(monkeypatch, table):
+    monkeypatch.setattr(ephemeris_utils, 'TABLE', table)
+    monkeypatch.setattr(ephemeris_utils, 'TABLE_LOADED', True)
+    return table
+
+def test_table_matches_live_ephem(table):
+    jd = np.random.default_rng(1).uniform(table.start + 2, table.end - 2, 200)
+    for name, cls in BODIES.items():
+        body = cls()
+        expected = [live_longitude(body, x) for x in jd]
+        assert angle_diff(table.longitudes(name, jd), expected).max() < TOLERANCE, name
+
+def test_stored_max_error_bounds_dense_samples(table):
+    jd = np.random.default_rng(2).uniform(table.start + 2, table.end - 2, 3000)
+    for name, cls in BODIES.items():
+        body = cls()
+        expected = [live_longitude(body, x) for x in jd]
+        assert angle_diff(table.longitudes(name, jd), expected).max() <= table.max_error, name
+
+def test_scalar_lookup_matches_vector_lookup(table):
+    jd = np.linspace(table.start + 2, table.end - 2, 50)
+    for name in BODIES:
+        scalar = [table.longitude_at(name, x) for x in jd]
+        assert angle_diff(scalar, table.longitudes(name, jd)).max() < 1e-9
+
+def test_lookups_fall_back_to_live_outside_the_table(use_table):
+    inside = use_table.start + 100.25
+    outside = use_table.end + 400.0
+    out = ephemeris_utils.get_tropical_longitudes([inside, outside])
+    for col, (name, cls) in enumerate(BODIES.items()):
+        assert angle_diff(out[1, col], live_longitude(cls(), outside)) < 1e-9
+        assert angle_diff(out[0, col], live_longitude(cls(), inside)) < TOLERANCE
+        assert angle_diff(ephemeris_utils.get_tropical_longitude(name, outside), out[1, col]) < 1e-9
+        assert angle_diff(ephemeris_utils.get_body_longitudes(name, [inside, outside]), out[:, col]).max() < 1e-9
+
+def rewrite_header(src, dst, **fields):
+    # Copy of the table at `src` with some header fields replaced
+    with open(src, 'rb') as f:
+        data = bytearray(f.read())
+    header = dict(zip(('magic', 'version', 'start', 'end', 'max_error', 'count'),
+                      ephemeris_utils.HEADER.unpack_from(data)))
+    header.update(fields)
+    ephemeris_utils.HEADER.pack_into(data, 0, *header.values())
+    with open(dst, 'wb') as f:
+        f.write(data)
+    return dst
+
+@pytest.mark.parametrize('fields', [{'magic': b'NOPE'}, {'version': ephemeris_utils.FORMAT_VERSION + 1}])
+def test_stale_header_is_rejected(tmp_path, fields):
+    src = str(tmp_path / 'good.bin')
+    build_ephemeris(src, 2000, 2000, check_every=50)
+    load_ephemeris(src)
+    with pytest.raises(ephemeris_utils.StaleEphemerisError):
+        load_ephemeris(rewrite_header(src, str(tmp_path / 'stale.bin'), **fields))
+
+def test_table_is_memory_mapped(table):
+    assert isinstance(table.samples['Moon'].base, np.memmap) or isinstance(table.samples['Moon'], np.memmap)
@@ -0,0 +1,25 @@
+import pytest
+
+import transit_utils
+from cache_utils import MemoryBackend
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = MemoryBackend()
+    monkeypatch.setattr(transit_utils, 'BACKEND', backend)
+    monkeypatch.setattr(transit_utils, 'SHANI_TABLE', None)
+    monkeypatch.setattr(transit_utils, 'SHANI_YEARS', (2020, 2030))
+    return backend
+
+def test_shani_table_is_shared_through_the_backend(backend, monkeypatch):
+    table = transit_utils.get_shani_table()
+    assert backend.get('shani:2020-2030') == table
+    # Another worker: no process copy, the backend entry is used as-is
+    monkeypatch.setattr(transit_utils, 'SHANI_TABLE', None)
+    monkeypatch.setattr(transit_utils, 'sign_spans', None)
+    assert transit_utils.get_shani_table() == table
+
+def test_sade_sati_for_capricorn_moon(backend):
+    # Saturn was in Capricorn through 2020-2022, in Capricorn's Sade Sati
+    name, start, end = transit_utils.shani_window_at(9, transit_utils.datetime.date(2021, 6, 1))
+    assert name == 'sade_sati' and start < end
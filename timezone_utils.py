@@ -0,0 +1,226 @@
+import datetime
+import os
+import struct
+import sys
+import numpy as np
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from gazetteer_utils import load_gazetteer, DEFAULT_PATH as GAZETTEER_PATH
+
+# Offline timezone resolution: lat/lon -> IANA zone through a grid index,
+# then zoneinfo for the UTC offset in force at the birth instant (DST,
+# war time and pre-standard local mean time included).
+#
+# The grid is built from the gazetteer, every place carrying its GeoNames
+# zone. A cell takes the zone of its most populous place; empty cells near
+# land take the zone of the nearest filled cell (up to FILL_CELLS away) and
+# the open sea falls back to nautical Etc/GMT zones by longitude.
+#
+# Build once (after the gazetteer) with:
+#   python timezone_utils.py [gazetteer.bin [timezones.bin]]
+#
+# File layout (little endian), memory-mapped read-only:
+#   magic b'VTZG', format version (u32), cell size in degrees (f64),
+#   rows, cols (u32), zone bytes (u64), zero padding to 16 bytes, then the
+#   uint16 zone index of every cell (row 0 at latitude -90, col 0 at
+#   longitude -180), padding, then newline separated zone names.
+
+DEFAULT_PATH = os.environ.get(
+    'VEDIC_TIMEZONES', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'timezones.bin'))
+
+MAGIC = b'VTZG'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sIdIIQ')
+
+CELL_SIZE = 0.25
+FILL_CELLS = 8 # ~2 degrees at CELL_SIZE
+NO_ZONE = 0xffff
+
+# Offset used when a request has neither a zone nor an offset and no grid
+# has been built (the app's historical IST default)
+DEFAULT_OFFSET = 5.5
+# Largest UTC offset in use (Kiribati, UTC+14; Baker Island is UTC-12)
+MAX_OFFSET = 14.0
+
+def nautical_zone(lon):
+    # Etc/GMT names have inverted signs: Etc/GMT-5 is UTC+5
+    hours = int(round(float(lon) / 15.0))
+    if hours == 0:
+        return 'Etc/GMT'
+    return f"Etc/GMT{-hours:+d}"
+
+def cell_of(lat, lon, rows, cols, cell):
+    # Grid row/col of points; works on scalars and arrays
+    row = np.clip(np.floor((np.asarray(lat, dtype=np.float64) + 90.0) / cell).astype(np.int64), 0, rows - 1)
+    col = np.floor((np.asarray(lon, dtype=np.float64) + 180.0) / cell).astype(np.int64) % cols
+    return row, col
+
+def build_timezones(gazetteer_path=GAZETTEER_PATH, path=DEFAULT_PATH, cell=CELL_SIZE):
+    """
+    Rasterizes the gazetteer's place zones into a grid and writes it.
+    """
+    gazetteer = load_gazetteer(gazetteer_path)
+    places = gazetteer.places
+    rows, cols = int(round(180 / cell)), int(round(360 / cell))
+
+    row, col = cell_of(places['lat'], places['lon'], rows, cols, cell)
+    flat = row * cols + col
+
+    # Most populous place last per cell, so its zone wins the assignment
+    order = np.lexsort((places['population'], flat))
+    flat = flat[order]
+    last = np.append(flat[1:] != flat[:-1], True)
+    grid = np.full(rows * cols, NO_ZONE, dtype='<u2')
+    grid[flat[last]] = places['tz'][order][last]
+    grid = grid.reshape(rows, cols)
+
+    # Grow the zones outwards into empty neighbouring cells
+    for _ in range(FILL_CELLS):
+        empty = grid == NO_ZONE
+        if not empty.any():
+            break
+        filled = grid.copy()
+        for shifted in (np.roll(grid, 1, axis=1), np.roll(grid, -1, axis=1),
+                        np.vstack([grid[:1], grid[:-1]]), np.vstack([grid[1:], grid[-1:]])):
+            take = empty & (shifted != NO_ZONE)
+            filled[take] = shifted[take]
+            empty &= ~take
+        grid = filled
+
+    zone_blob = '\n'.join(gazetteer.zones).encode('utf-8')
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, cell, rows, cols, len(zone_blob))
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        for section in (header, grid.tobytes(), zone_blob):
+            f.write(section)
+            f.write(b'\0' * (-len(section) % 16))
+    os.replace(tmp_path, path)
+
+    covered = float(np.mean(grid != NO_ZONE))
+    print(f"{rows}x{cols} cells, {len(gazetteer.zones)} zones, {covered:.1%} of cells on a named zone")
+    return path
+
+class StaleTimezonesError(Exception):
+    pass
+
+class TimezoneGrid:
+    """
+    Read-only view over a memory-mapped timezone grid.
+    """
+
+    def __init__(self, grid, zones, cell):
+        self.grid = grid
+        self.zones = zones
+        self.cell = cell
+
+    def zone_at(self, lat, lon):
+        row, col = cell_of(lat, lon, self.grid.shape[0], self.grid.shape[1], self.cell)
+        idx = int(self.grid[row, col])
+        if idx == NO_ZONE:
+            return nautical_zone(lon)
+        return self.zones[idx]
+
+def load_timezones(path=DEFAULT_PATH):
+    """
+    Maps a timezone grid file. Raises StaleTimezonesError if the header
+    does not match this code.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(HEADER.size)
+    magic, version, cell, rows, cols, zone_bytes = HEADER.unpack_from(head)
+    if magic != MAGIC:
+        raise StaleTimezonesError(f"{path} is not a timezone grid")
+    if version != FORMAT_VERSION:
+        raise StaleTimezonesError(f"{path} has format version {version}, expected {FORMAT_VERSION}; rebuild it")
+
+    offset = HEADER.size + (-HEADER.size % 16)
+    grid = np.memmap(path, dtype='<u2', mode='r', offset=offset, shape=(rows, cols))
+    offset += grid.nbytes + (-grid.nbytes % 16)
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        zones = f.read(zone_bytes).decode('utf-8').split('\n')
+    return TimezoneGrid(grid, zones, cell)
+
+TIMEZONES = None
+TIMEZONES_LOADED = False
+
+def get_timezones():
+    """
+    Returns the shared TimezoneGrid, or None if no grid has been built.
+    """
+    global TIMEZONES, TIMEZONES_LOADED
+    if not TIMEZONES_LOADED:
+        TIMEZONES_LOADED = True
+        if os.path.exists(DEFAULT_PATH):
+            try:
+                TIMEZONES = load_timezones(DEFAULT_PATH)
+            except (StaleTimezonesError, OSError, struct.error, ValueError) as e:
+                print(f"Timezone grid disabled: {e}")
+    return TIMEZONES
+
+def zone_at(lat, lon):
+    """
+    IANA zone name for a point, or None when no grid has been built.
+    """
+    grid = get_timezones()
+    return grid.zone_at(lat, lon) if grid is not None else None
+
+def get_utc_offset(zone, dob, tob):
+    """
+    UTC offset (hours) of `zone` at the local birth date/time. Times that
+    fall in a DST gap or overlap use the offset before the change.
+    """
+    try:
+        tzinfo = ZoneInfo(zone)
+    except (ZoneInfoNotFoundError, ValueError):
+        raise ValueError(f"Unknown timezone: {zone}")
+    local_dt = datetime.datetime.strptime(f"{dob} {tob}", "%Y-%m-%d %H:%M")
+    return tzinfo.utcoffset(local_dt).total_seconds() / 3600.0
+
+def resolve_offset(dob, tob, lat, lon, tz=None, zone=None):
+    """
+    UTC offset (hours) for a birth: an explicit zone name wins, then an
+    explicit offset, then the zone found at lat/lon.
+    """
+    if zone:
+        return get_utc_offset(zone, dob, tob)
+    if tz not in (None, ''):
+        try:
+            return float(tz)
+        except (TypeError, ValueError):
+            raise ValueError("tz must be a number of hours")
+    zone = zone_at(lat, lon)
+    if zone is None:
+        return DEFAULT_OFFSET
+    return get_utc_offset(zone, dob, tob)
+
+def birth_params(data):
+    """
+    (dob, tob, lat, lon, tz) from a request body or input record. The UTC
+    offset comes from 'zone' (IANA name, resolved at the birth instant) or
+    'tz' (hours), or else from the zone at lat/lon.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Expected a JSON object")
+    missing = [field for field in ('dob', 'tob', 'lat', 'lon') if data.get(field) in (None, '')]
+    if missing:
+        raise ValueError(f"Missing birth data: {', '.join(missing)}")
+    dob = data['dob']
+    tob = data['tob']
+    try:
+        lat = float(data['lat'])
+        lon = float(data['lon'])
+    except (TypeError, ValueError):
+        raise ValueError("lat and lon must be numbers")
+    # Comparisons are False for NaN, so these also reject nan and inf
+    if not -90.0 <= lat <= 90.0:
+        raise ValueError("lat must be between -90 and 90")
+    if not -180.0 <= lon <= 180.0:
+        raise ValueError("lon must be between -180 and 180")
+    tz = resolve_offset(dob, tob, lat, lon, data.get('tz'), data.get('zone'))
+    if not -MAX_OFFSET <= tz <= MAX_OFFSET:
+        raise ValueError(f"tz must be between -{MAX_OFFSET:g} and {MAX_OFFSET:g} hours")
+    return dob, tob, lat, lon, tz
+
+if __name__ == '__main__':
+    print(f"Written {build_timezones(*sys.argv[1:3])}")
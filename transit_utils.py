@@ -1,134 +1,480 @@
-import ephem
+import bisect
 import datetime
+import math
+import os
+import time
+import numpy as np
+
+from astronomy_utils import SIDEREAL_BODIES as TRANSIT_BODIES, sidereal_longitude, sidereal_longitudes
+from cache_utils import make_backend
 
 # Zodiac Signs Mapping (0 = Aries, ..., 11 = Pisces)
 SIGNS = ['Aries', 'Taurus', 'Gemini', 'Cancer', 'Leo', 'Virgo', 
          'Libra', 'Scorpio', 'Sagittarius', 'Capricorn', 'Aquarius', 'Pisces']
 
+# Transit (Gochar) cache. A planet's sign only changes at its next ingress,
+# so each sign is computed once and kept until that instant: the ingress is
+# found by sampling the planet once per bucket (an hour for the Moon, a day
+# for the rest) until its sign changes, then bisecting to the minute.
+# Entries go in a cache_utils backend with a TTL ending at the ingress;
+# VEDIC_TRANSIT_CACHE picks it (memory by default, or the sqlite:/// and
+# redis:// stores to share one set of entries between workers).
+
+TRANSIT_CACHE = os.environ.get('VEDIC_TRANSIT_CACHE', 'memory')
+# Shared by the sign cache and the transit calendar's per-year event rows
+TRANSIT_CACHE_SIZE = int(os.environ.get('VEDIC_TRANSIT_CACHE_SIZE', 4096))
+
+UNIX_EPOCH_JD = 2440587.5
+
+# Sampling step (days) when looking for the next ingress
+TRANSIT_BUCKETS = {
+    'Sun': 1.0, 'Moon': 1.0 / 24, 'Mercury': 1.0, 'Venus': 1.0,
+    'Mars': 1.0, 'Jupiter': 1.0, 'Saturn': 1.0, 'Rahu': 1.0, 'Ketu': 1.0,
+}
+
+# Longest stay in one sign, retrogression included (days); an entry with no
+# ingress found this far ahead just expires there
+MAX_STAY = {
+    'Sun': 32, 'Moon': 3, 'Mercury': 100, 'Venus': 160,
+    'Mars': 250, 'Jupiter': 420, 'Saturn': 1100, 'Rahu': 700, 'Ketu': 700,
+}
+
+# Ingress times are refined to this (days; one minute)
+INGRESS_PRECISION = 1.0 / 1440
+
+def now_jd():
+    return time.time() / 86400.0 + UNIX_EPOCH_JD
+
+def to_jd(when):
+    # Naive datetimes and dates are taken as UTC
+    if not isinstance(when, datetime.datetime):
+        when = datetime.datetime(when.year, when.month, when.day)
+    return (when - datetime.datetime(1970, 1, 1)).total_seconds() / 86400.0 + UNIX_EPOCH_JD
+
+def from_jd(jd):
+    return datetime.datetime(1970, 1, 1) + datetime.timedelta(days=jd - UNIX_EPOCH_JD)
+
+def format_jd(jd):
+    return from_jd(jd).strftime("%Y-%m-%d %H:%M")
+
+def transit_sign(planet, jd):
+    return int(sidereal_longitude(planet, jd) // 30)
+
+def next_ingress(planet, jd, sign=None):
+    """
+    Julian date at which `planet` leaves the sign it is in at `jd`, either
+    way round (a retrograde planet can re-enter the previous sign).
+    """
+    if sign is None:
+        sign = transit_sign(planet, jd)
+    step = TRANSIT_BUCKETS[planet]
+    horizon = jd + MAX_STAY[planet]
+
+    lo = jd
+    hi = jd + step
+    while transit_sign(planet, hi) == sign:
+        if hi >= horizon:
+            return horizon
+        lo, hi = hi, hi + step
+
+    while hi - lo > INGRESS_PRECISION:
+        mid = (lo + hi) / 2
+        if transit_sign(planet, mid) == sign:
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+class TransitCache:
+    """
+    Sign of each transiting planet, cached until its next ingress.
+    Entries are (sign, valid_from, ingress) keyed by planet.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else get_transit_backend()
+        self.hits = 0
+        self.misses = 0
+
+    def entry(self, planet, jd):
+        key = 'transit:' + planet
+        entry = self.backend.get(key)
+        if entry is not None and entry[1] <= jd < entry[2]:
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        sign = transit_sign(planet, jd)
+        entry = (sign, jd, next_ingress(planet, jd, sign))
+        ttl = (entry[2] - now_jd()) * 86400.0
+        if ttl > 0:
+            self.backend.set(key, entry, ttl)
+        return entry
+
+    def signs(self, jd=None):
+        """
+        {planet: sign index} at `jd` (default now).
+        """
+        jd = now_jd() if jd is None else jd
+        return {planet: self.entry(planet, jd)[0] for planet in TRANSIT_BODIES}
+
+    def ingresses(self, jd=None):
+        """
+        {planet: Julian date of its next ingress} from `jd` (default now).
+        """
+        jd = now_jd() if jd is None else jd
+        return {planet: self.entry(planet, jd)[2] for planet in TRANSIT_BODIES}
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+BACKEND = None
+TRANSITS = None
+
+def get_transit_backend():
+    global BACKEND
+    if BACKEND is None:
+        BACKEND = make_backend(TRANSIT_CACHE, TRANSIT_CACHE_SIZE)
+    return BACKEND
+
+def get_transit_cache():
+    """
+    Returns the shared TransitCache.
+    """
+    global TRANSITS
+    if TRANSITS is None:
+        TRANSITS = TransitCache()
+    return TRANSITS
+
 def get_current_transits():
     """
-    Calculates current planetary positions (Gochar) for today.
+    Planetary positions (Gochar) right now, from the transit cache.
     Returns a dictionary: {'Planet': 'SignName'}
     """
-    transit_positions = {}
-    today = datetime.datetime.now()
-    
-    # Planets to track for key transits
-    # Focusing on major slow-moving planets + Nodes
-    planets = {
-        'Saturn': ephem.Saturn(),
-        'Jupiter': ephem.Jupiter(),
-        'Rahu': ephem.Moon(), # Placeholder, Ephem doesn't have Rahu directly usually?
-        # Actually Ephem has strict planets. Nodes are often calculated relative to Moon/Sun.
-        # But commonly we approximate or use a library that supports it. 
-        # Alternatively, we can calculate node position manually if ephem doesn't support it directly in base.
-        # Let's check available bodies. 
-        # For MVP Transit: Saturn and Jupiter are most critical. 
-        # Adding Mars, Sun, Venus, Mercury for thoroughness.
-        'Mars': ephem.Mars(),
-        'Sun': ephem.Sun(),
-        'Venus': ephem.Venus(),
-        'Mercury': ephem.Mercury(),
-        'Moon': ephem.Moon()
-    }
-
-    # Observer setup
-    obs = ephem.Observer()
-    obs.date = today
-    
-    for name, body in planets.items():
-        body.compute(obs)
-        
-        if name == 'Rahu':
-             # Ephem doesn't support Rahu directly easily without extensions in some versions.
-             # We might skip Rahu/Ketu for Gochar in this simple version or use a simplified approximation if needed.
-             # To be safe and avoid "AttributeError", let's strictly stick to standard planets first.
-             continue
-
-        # Calculate Sidereal Longitude (Nirayana)
-        # 1. Get Geocentric Ecliptic Longitude (Tropical) using ephem.Ecliptic
-        ecl = ephem.Ecliptic(body)
-        tropical_lon_rad = ecl.lon # this is in radians
-        
-        tropical_lon_deg = float(tropical_lon_rad) * 180.0 / 3.14159265359 # Rad to Deg
-        
-        # 2. Subtract Ayanamsa (~24.1 deg for Lahiri)
-        ayanamsa = 24.1 
-        sidereal_lon = (tropical_lon_deg - ayanamsa) % 360
-        
-        sign_index = int(sidereal_lon // 30)
-        sign_name = SIGNS[sign_index]
-        transit_positions[name] = sign_name
-        
-    return transit_positions
+    return {planet: SIGNS[sign] for planet, sign in get_transit_cache().signs().items()}
 
-def analyze_transits(birth_moon_sign, transit_positions, relevant_planets=None):
+# --- TRANSIT CALENDAR ---
+# Sign ingresses and stations (retrograde/direct) of every planet, found by
+# root finding rather than stepping through the days: longitudes are
+# sampled on a coarse grid, stations are bracketed where the motion changes
+# direction and bisected on the speed, and between stations, where the
+# longitude is monotonic, each sign boundary crossed is bisected on the
+# longitude. Events are computed per calendar year and kept in the transit
+# backend, so every worker shares one table.
+
+# Grid step (days), under a third of the shortest retrograde spell of the
+# planet (Mercury's is ~3 weeks) so stations always fall in separate steps,
+# and short enough for the Moon's longitude to unwrap
+CALENDAR_STEPS = {
+    'Sun': 5.0, 'Moon': 5.0, 'Mercury': 5.0, 'Venus': 10.0,
+    'Mars': 15.0, 'Jupiter': 20.0, 'Saturn': 20.0,
+    # The true node wobbles back and forth within days
+    'Rahu': 1.0, 'Ketu': 1.0,
+}
+# The Sun and Moon never station, and the nodes' wobble is not reported
+STATIONARY = ('Mercury', 'Venus', 'Mars', 'Jupiter', 'Saturn')
+# Half-width (days) of the central difference used for the speed
+SPEED_DELTA = 0.05
+
+# Saturn's position from the natal Moon sign (houses, 1 = the Moon's sign)
+SHANI_HOUSES = {
+    'sade_sati': frozenset([12, 1, 2]),
+    'dhaiya': frozenset([4]),
+    'ashtama_shani': frozenset([8]),
+}
+# Years covered by the shared Saturn windows table
+SHANI_YEARS = tuple(int(y) for y in os.environ.get('VEDIC_SHANI_YEARS', '1900-2100').split('-'))
+
+def wrap(deg):
+    # Degrees to (-180, 180]
+    return (deg + 180) % 360 - 180
+
+def speed(planet, jd):
+    # Degrees per day, negative when retrograde
+    return wrap(sidereal_longitude(planet, jd + SPEED_DELTA) - sidereal_longitude(planet, jd - SPEED_DELTA)) / (2 * SPEED_DELTA)
+
+def find_station(planet, lo, hi):
     """
-    Analyzes the impact of transits relative to the Birth Moon (Rashi).
-    Can focus on specific 'relevant_planets' (e.g. House Lord of the topic).
+    (jd, kind) of the station bracketed by [lo, hi]: 'retrograde' where
+    the planet turns backwards, 'direct' where it resumes.
+    """
+    forward = speed(planet, lo) > 0
+    while hi - lo > INGRESS_PRECISION:
+        mid = (lo + hi) / 2
+        if (speed(planet, mid) > 0) == forward:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2, 'retrograde' if forward else 'direct'
+
+def find_crossing(planet, boundary, lo, hi):
+    # Instant in [lo, hi] the (monotonic there) longitude reaches `boundary`
+    before = wrap(sidereal_longitude(planet, lo) - boundary) < 0
+    while hi - lo > INGRESS_PRECISION:
+        mid = (lo + hi) / 2
+        if (wrap(sidereal_longitude(planet, mid) - boundary) < 0) == before:
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+def find_events(planet, start, end):
+    """
+    Ingresses and stations of `planet` in [start, end) (Julian dates), in
+    time order, as (jd, planet, kind, sign): kind is 'ingress' (sign is
+    the one entered), 'retrograde' or 'direct' (sign it stations in).
+    """
+    step = CALENDAR_STEPS[planet]
+    grid = np.arange(start - 2 * step, end + 3 * step, step)
+    lons = np.unwrap(sidereal_longitudes(planet, grid), period=360)
+
+    # Stations: consecutive steps moving in opposite directions
+    points = list(zip(grid.tolist(), lons.tolist()))
+    events = []
+    if planet in STATIONARY:
+        forward = np.diff(lons) > 0
+        for i in np.flatnonzero(forward[1:] != forward[:-1]).tolist():
+            jd, kind = find_station(planet, grid[i], grid[i + 2])
+            events.append((jd, planet, kind, transit_sign(planet, jd)))
+            points.append((jd, None))
+
+    # Ingresses: boundaries crossed between neighbouring grid points and
+    # stations, which bound monotonic stretches
+    points.sort()
+    jds = [jd for jd, _ in points]
+    unwrapped = np.unwrap([lon if lon is not None else sidereal_longitude(planet, jd) for jd, lon in points],
+                          period=360).tolist()
+    for i in range(len(points) - 1):
+        lo_sign = math.floor(unwrapped[i] / 30)
+        hi_sign = math.floor(unwrapped[i + 1] / 30)
+        if hi_sign > lo_sign:
+            for k in range(lo_sign + 1, hi_sign + 1):
+                jd = find_crossing(planet, (k * 30) % 360, jds[i], jds[i + 1])
+                events.append((jd, planet, 'ingress', k % 12))
+        elif hi_sign < lo_sign:
+            for k in range(lo_sign, hi_sign, -1):
+                jd = find_crossing(planet, (k * 30) % 360, jds[i], jds[i + 1])
+                events.append((jd, planet, 'ingress', (k - 1) % 12))
+
+    events = [e for e in events if start <= e[0] < end]
+    events.sort()
+    return events
+
+def year_events(planet, year):
+    """
+    find_events for one calendar year (UTC), cached in the transit backend.
+    """
+    key = f'calendar:{planet}:{year}'
+    backend = get_transit_backend()
+    events = backend.get(key)
+    if events is None:
+        events = find_events(planet, to_jd(datetime.date(year, 1, 1)), to_jd(datetime.date(year + 1, 1, 1)))
+        backend.set(key, events)
+    return events
+
+def transit_calendar(start, end, planets=None):
+    """
+    Ingresses and stations between two dates (datetimes or dates, UTC),
+    all planets or those in `planets`, in time order.
+    """
+    lo, hi = to_jd(start), to_jd(end)
+    events = []
+    for planet in planets or TRANSIT_BODIES:
+        for year in range(start.year, end.year + 1):
+            events.extend(e for e in year_events(planet, year) if lo <= e[0] < hi)
+    events.sort()
+    return events
+
+def sign_spans(planet, start_year, end_year):
+    """
+    [(sign, start_jd, end_jd)] covering start_year..end_year, from the
+    planet's ingresses.
+    """
+    start = to_jd(datetime.date(start_year, 1, 1))
+    end = to_jd(datetime.date(end_year + 1, 1, 1))
+    spans = []
+    sign = transit_sign(planet, start)
+    since = start
+    for year in range(start_year, end_year + 1):
+        for jd, _, kind, entered in year_events(planet, year):
+            if kind == 'ingress':
+                spans.append((sign, since, jd))
+                sign, since = entered, jd
+    spans.append((sign, since, end))
+    return spans
+
+def shani_windows(moon_sign, spans):
+    """
+    {'sade_sati': [(start_jd, end_jd)], 'dhaiya': [...], 'ashtama_shani':
+    [...]} for a natal Moon sign (0-11), from Saturn's sign spans. A window
+    runs while Saturn stays in its houses, retrograde re-entries included.
+    """
+    windows = {}
+    for name, houses in SHANI_HOUSES.items():
+        intervals = []
+        for sign, start, end in spans:
+            if (sign - moon_sign) % 12 + 1 not in houses:
+                continue
+            if intervals and intervals[-1][1] == start:
+                intervals[-1] = (intervals[-1][0], end)
+            else:
+                intervals.append((start, end))
+        windows[name] = intervals
+    return windows
+
+SHANI_TABLE = None
+
+def get_shani_table():
+    """
+    Saturn windows of every natal Moon sign over SHANI_YEARS:
+    [moon_sign] -> shani_windows. Stored in the transit backend like
+    year_events, so with a shared backend only one worker builds it;
+    each process then keeps its own copy.
+    """
+    global SHANI_TABLE
+    if SHANI_TABLE is None:
+        key = 'shani:%d-%d' % SHANI_YEARS
+        backend = get_transit_backend()
+        table = backend.get(key)
+        if table is None:
+            spans = sign_spans('Saturn', *SHANI_YEARS)
+            table = [shani_windows(moon_sign, spans) for moon_sign in range(12)]
+            backend.set(key, table)
+        SHANI_TABLE = table
+    return SHANI_TABLE
+
+def shani_window_at(moon_sign, when=None):
+    """
+    (name, start_jd, end_jd) of the Saturn window running for a natal Moon
+    sign at `when` (default now), or None. Answers "when does my Sade Sati
+    end?" with a bisect per window list.
+    """
+    jd = now_jd() if when is None else to_jd(when)
+    for name, intervals in get_shani_table()[moon_sign].items():
+        i = bisect.bisect_right(intervals, (jd, math.inf)) - 1
+        if i >= 0 and intervals[i][0] <= jd < intervals[i][1]:
+            return (name,) + intervals[i]
+    return None
+
+# --- TRANSIT SCORING ---
+# Codes for a transiting planet's house from the natal Moon, as tables
+# indexed by house (1-12), so many users are scored with NumPy indexing
+# and text is only rendered for those who are notified.
+
+STATUS_NAMES = ['Neutral', 'Favorable (Upachaya)', 'Supportive (Trikona)', 'Active (Kendra)', 'Challenging']
+NEUTRAL, UPACHAYA, TRIKONA, KENDRA, DUSTHANA = range(5)
+HOUSE_STATUS = np.array([NEUTRAL, TRIKONA, NEUTRAL, UPACHAYA, KENDRA, TRIKONA, UPACHAYA,
+                         KENDRA, DUSTHANA, TRIKONA, KENDRA, UPACHAYA, DUSTHANA], dtype=np.int8)
+
+# Saturn's phase by house from the Moon (0: none)
+SATURN_PHASES = [
+    None,
+    "**Sade Sati (Rising):** Saturn in 12th from Moon ({sign}). Expenses/restlessness.",
+    "**Sade Sati (Peak):** Saturn on Moon ({sign}). Intense pressure/work.",
+    "**Sade Sati (Setting):** Saturn in 2nd from Moon ({sign}). Financial/speech caution.",
+    "**Dhaiya:** Saturn in 4th. Domestic/career changes.",
+    "**Ashtama Shani:** Saturn in 8th. Sudden obstacles.",
+]
+SATURN_PHASE = np.zeros(13, dtype=np.int8)
+SATURN_PHASE[[12, 1, 2, 4, 8]] = [1, 2, 3, 4, 5]
+
+JUPITER_BLESSING = np.zeros(13, dtype=bool)
+JUPITER_BLESSING[[2, 5, 7, 9, 11]] = True
+
+PLANET_COLUMN = {planet: i for i, planet in enumerate(TRANSIT_BODIES)}
+
+def render_transits(moon_idx, transit_signs, relevant_planets=None):
+    """
+    analyze_transits text for a natal Moon sign index and {planet: sign
+    index} of the transiting planets.
     """
-    if not birth_moon_sign or birth_moon_sign not in SIGNS:
-        return "Values for Moon Sign are missing, so Transit analysis is skipped."
-        
-    moon_idx = SIGNS.index(birth_moon_sign)
-    
     analysis = []
-    
+
     # 1. SATURN TRANSIT (Global Importance)
-    if 'Saturn' in transit_positions:
-        sat_sign = transit_positions['Saturn']
-        sat_idx = SIGNS.index(sat_sign)
-        pos_from_moon = (sat_idx - moon_idx) % 12 + 1
-        
-        msg = ""
-        if pos_from_moon == 12:
-            msg = f"**Sade Sati (Rising):** Saturn in 12th from Moon ({sat_sign}). Expenses/restlessness."
-        elif pos_from_moon == 1:
-            msg = f"**Sade Sati (Peak):** Saturn on Moon ({sat_sign}). Intense pressure/work."
-        elif pos_from_moon == 2:
-            msg = f"**Sade Sati (Setting):** Saturn in 2nd from Moon ({sat_sign}). Financial/speech caution."
-        elif pos_from_moon == 4:
-            msg = f"**Dhaiya:** Saturn in 4th. Domestic/career changes."
-        elif pos_from_moon == 8:
-            msg = f"**Ashtama Shani:** Saturn in 8th. Sudden obstacles."
-        
-        if msg:
-            analysis.append(msg)
+    if 'Saturn' in transit_signs:
+        sat_idx = transit_signs['Saturn']
+        phase = SATURN_PHASE[(sat_idx - moon_idx) % 12 + 1]
+        if phase:
+            analysis.append(SATURN_PHASES[phase].format(sign=SIGNS[sat_idx]))
 
     # 2. JUPITER TRANSIT (Global Importance)
-    if 'Jupiter' in transit_positions:
-        jup_sign = transit_positions['Jupiter']
-        jup_idx = SIGNS.index(jup_sign)
+    if 'Jupiter' in transit_signs:
+        jup_idx = transit_signs['Jupiter']
         pos_from_moon = (jup_idx - moon_idx) % 12 + 1
-        
-        if pos_from_moon in [2, 5, 7, 9, 11]:
-            analysis.append(f"**Jupiter Blessing:** Transiting {pos_from_moon}th house ({jup_sign}). Good for growth.")
+        if JUPITER_BLESSING[pos_from_moon]:
+            analysis.append(f"**Jupiter Blessing:** Transiting {pos_from_moon}th house ({SIGNS[jup_idx]}). Good for growth.")
 
     # 3. CONTEXT SPECIFIC PLANETS
     if relevant_planets:
         analysis.append("\n**Key Planet Transits for this Topic:**")
         dedup_planets = set(relevant_planets)
-        
+
         for planet in dedup_planets:
-            if planet in transit_positions:
-                curr_sign = transit_positions[planet]
-                p_idx = SIGNS.index(curr_sign)
+            if planet in transit_signs:
+                p_idx = transit_signs[planet]
                 h_from_moon = (p_idx - moon_idx) % 12 + 1
-                
-                # Simple interpretation
-                status = "Neutral"
-                if h_from_moon in [3, 6, 11]:
-                    status = "Favorable (Upachaya)"
-                elif h_from_moon in [8, 12]:
-                    status = "Challenging"
-                elif h_from_moon in [1, 5, 9]:
-                    status = "Supportive (Trikona)"
-                elif h_from_moon in [4, 7, 10]:
-                    status = "Active (Kendra)"
-
-                analysis.append(f"- **{planet}:** Currently in {curr_sign} ({h_from_moon}th from Moon). Status: *{status}*.")
-    
+                status = STATUS_NAMES[HOUSE_STATUS[h_from_moon]]
+                analysis.append(f"- **{planet}:** Currently in {SIGNS[p_idx]} ({h_from_moon}th from Moon). Status: *{status}*.")
+
     if not analysis:
         return "No major transit effects noted."
 
     return "\n".join(analysis)
+
+def analyze_transits(birth_moon_sign, transit_positions, relevant_planets=None):
+    """
+    Analyzes the impact of transits relative to the Birth Moon (Rashi).
+    Can focus on specific 'relevant_planets' (e.g. House Lord of the topic).
+    """
+    if not birth_moon_sign or birth_moon_sign not in SIGNS:
+        return "Values for Moon Sign are missing, so Transit analysis is skipped."
+
+    transit_signs = {planet: SIGNS.index(sign) for planet, sign in transit_positions.items()}
+    return render_transits(SIGNS.index(birth_moon_sign), transit_signs, relevant_planets)
+
+class TransitScores:
+    """
+    Transits scored for many natal Moon signs at once against one
+    transit sign vector (TRANSIT_BODIES order). Every array has one row per user;
+    houses and status have one column per planet.
+    """
+
+    def __init__(self, moon_signs, transit_signs):
+        self.moon_signs = np.asarray(moon_signs, dtype=np.int8)
+        self.transit_signs = np.asarray(transit_signs, dtype=np.int8)
+
+        # House from the Moon of every planet for every user
+        self.houses = ((self.transit_signs[None, :] - self.moon_signs[:, None]) % 12 + 1).astype(np.int8)
+        self.status = HOUSE_STATUS[self.houses]
+        self.saturn_phase = SATURN_PHASE[self.houses[:, PLANET_COLUMN['Saturn']]]
+        self.jupiter_blessing = JUPITER_BLESSING[self.houses[:, PLANET_COLUMN['Jupiter']]]
+
+    def __len__(self):
+        return len(self.moon_signs)
+
+    def notable(self):
+        """
+        Rows with a Saturn phase or a Jupiter blessing running, i.e. those
+        whose analyze_transits text is more than the per-topic lines.
+        """
+        return np.flatnonzero((self.saturn_phase > 0) | self.jupiter_blessing)
+
+    def render(self, i, relevant_planets=None):
+        """
+        analyze_transits text for row i.
+        """
+        transit_signs = dict(zip(TRANSIT_BODIES, self.transit_signs.tolist()))
+        return render_transits(int(self.moon_signs[i]), transit_signs, relevant_planets)
+
+def score_transits(moon_signs, jd=None):
+    """
+    TransitScores for natal Moon sign indices (0-11) against the transit
+    signs at `jd` (default now), which are computed once for the batch.
+    """
+    signs = get_transit_cache().signs(jd)
+    return TransitScores(moon_signs, [signs[planet] for planet in TRANSIT_BODIES])